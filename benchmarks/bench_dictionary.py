@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+'''
+Peak memory of compiling each bundled specification.
+
+dom
+    Parse the whole document into an ElementTree and keep it alive
+    while compiling, as register_version used to.
+
+stream
+    Compile it with `phixlib.dictionary.compile_dictionary`, which
+    parses incrementally and discards elements as soon as they are
+    compiled.
+
+Every sample runs in a fresh interpreter. Peak memory is the growth of
+the maximum resident set size while compiling.
+
+    $ python benchmarks/bench_dictionary.py
+
+'''
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+from __future__ import print_function
+import resource
+import sys
+import time
+from cStringIO import StringIO
+from xml.etree import ElementTree
+from phixlib.dictionary import compile_dictionary
+
+mode, path = sys.argv[1:]
+with open(path, 'rb') as f:
+    content = f.read()
+
+def dom(content):
+    # hold on to the whole tree while compiling, like the old loader
+    root = ElementTree.fromstring(content)
+    return compile_dictionary(StringIO(content)), root
+
+def stream(content):
+    return compile_dictionary(StringIO(content))
+
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t = time.time()
+spec = {'dom': dom, 'stream': stream}[mode](content)
+elapsed = time.time() - t
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss
+print(peak, elapsed)
+'''
+
+
+def run(mode, path):
+    out = subprocess.check_output([sys.executable, '-c', CHILD, mode, path],
+                                  cwd=ROOT)
+    peak, elapsed = out.split()
+    return int(peak), float(elapsed)
+
+
+def main():
+    directory = os.path.join(ROOT, 'phixlib', 'spec')
+    names = sorted(n for n in os.listdir(directory) if n.startswith('FIX'))
+
+    print('compile each bundled spec: peak RSS growth (kB) and time (ms)')
+    print('  %-14s %10s %10s %10s %10s' % ('spec', 'dom kB', 'stream kB',
+                                          'dom ms', 'stream ms'))
+
+    for name in names:
+        path = os.path.join(directory, name)
+        dom = run('dom', path)
+        stream = run('stream', path)
+        print('  %-14s %10d %10d %10.1f %10.1f' % (
+            name, dom[0], stream[0], dom[1] * 1000, stream[1] * 1000))
+
+
+if __name__ == '__main__':
+    main()
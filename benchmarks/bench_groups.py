@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+'''
+Cost of parsing FIX 4.4 messages heavy in repeating groups.
+
+MarketDataSnapshotFullRefresh
+    *entries* MDEntries, a group of one level.
+
+NewOrderList
+    *entries* Orders, each with two PartyIDs, a group nested in it.
+
+NewOrderCross
+    Two Sides, each with *entries* PartyIDs with two PartySubIDs each,
+    groups nested three levels deep.
+
+parse
+    `phixlib.parser.parse_message` of the raw message.
+
+fromstring
+    `FIXMessage.fromstring`, parsing the message and creating the
+    `FIXMessage` of it.
+
+Samples are per message, best of *repeat* runs of *number* parses.
+
+    $ python benchmarks/bench_groups.py [entries] [number] [repeat]
+
+'''
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parser import HEADER
+from phixlib import FIX
+from phixlib.parser import parse_message
+
+
+def parties(count, subs=0):
+    return [dict({'PartyID': 'P%04d' % i, 'PartyIDSource': 'D', 'PartyRole': '3'},
+                 **({'NoPartySubIDs': [{'PartySubID': 'S%d' % j, 'PartySubIDType': '2'}
+                                       for j in range(subs)]} if subs else {}))
+            for i in range(count)]
+
+
+def messages(entries):
+    return [
+        ('MarketDataSnapshotFullRefresh', dict(
+            HEADER, Symbol='IBM', MDReqID='R1',
+            NoMDEntries=[{'MDEntryType': str(i % 2),
+                          'MDEntryPx': '101.%02d' % (i % 100),
+                          'MDEntrySize': str(100 * (i + 1))} for i in range(entries)])),
+        ('NewOrderList', dict(
+            HEADER, ListID='L1', BidType='1', TotNoOrders=str(entries),
+            NoOrders=[{'ClOrdID': 'C%04d' % i, 'ListSeqNo': str(i + 1),
+                       'NoPartyIDs': parties(2), 'Symbol': 'IBM', 'Side': '1',
+                       'OrderQty': '100', 'OrdType': '2', 'Price': '101.25'}
+                      for i in range(entries)])),
+        ('NewOrderCross', dict(
+            HEADER, CrossID='X1', CrossType='1', CrossPrioritization='0',
+            NoSides=[{'Side': str(i + 1), 'ClOrdID': 'C%d' % i,
+                      'NoPartyIDs': parties(entries, 2), 'OrderQty': '100'}
+                     for i in range(2)],
+            Symbol='IBM', TransactTime='20150406-18:23:24.381', OrdType='1')),
+    ]
+
+
+def main(entries=20, number=2000, repeat=5):
+    entries, number, repeat = int(entries), int(number), int(repeat)
+
+    print('parsing a message, per message, best of %d' % (repeat, ))
+    print('  %-30s %6s %11s %11s' % ('message', 'fields', 'parse', 'fromstring'))
+
+    for name, fields in messages(entries):
+        cls = FIX.FIX44[name]
+        raw = str(cls(**fields))
+        count = raw.count('\001')
+
+        assert str(cls.fromstring(raw)) == raw
+
+        samples = [
+            min(timeit.repeat(f, number=number, repeat=repeat)) / number
+            for f in (lambda: parse_message(raw),
+                      lambda: cls.fromstring(raw))]
+
+        print('  %-30s %6d %8.2f us %8.2f us' % (
+            name, count, samples[0] * 1e6, samples[1] * 1e6))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+'''
+Cost of importing phixlib, broken down by phase.
+
+pkg_resources
+    Importing pkg_resources, which phixlib used to read its bundled
+    data with. phixlib no longer imports it, this is for reference.
+
+import phixlib
+    ``import phixlib`` in a fresh interpreter. This is what every
+    short-lived worker pays, and what the target applies to.
+
+generators data
+    Loading the ISO codes and word list value generators pick from,
+    which now happens the first time a generator needs them.
+
+registration
+    Registering FIX.4.2, from the compiled dictionary cache, the first
+    time it is accessed.
+
+Every sample runs in a fresh interpreter, with byte-compiled modules
+(as an installed phixlib would have). The benchmark fails if the
+best ``import phixlib`` time exceeds the target, or if importing
+phixlib loads any of the modules it defers.
+
+    $ python benchmarks/bench_import.py [repeat] [target ms]
+
+'''
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGET_MS = 25.0
+
+# modules `import phixlib` must not pull in
+
+DEFERRED = ('pkg_resources', 'json', 'tempfile', 'xml.etree.cElementTree')
+
+PKG_RESOURCES = '''
+from __future__ import print_function
+import sys
+import time
+
+t = time.time()
+import pkg_resources
+print(time.time() - t)
+'''
+
+PHIXLIB = '''
+from __future__ import print_function
+import sys
+import time
+
+t = time.time()
+import phixlib
+imported = time.time() - t
+
+deferred = [m for m in sys.argv[1:] if m in sys.modules]
+
+from phixlib import generators
+t = time.time()
+generators.iso_codes()
+generators.wordlist()
+data = time.time() - t
+
+t = time.time()
+phixlib.FIX.FIX42
+registered = time.time() - t
+
+print(imported, data, registered, ','.join(deferred) or '-')
+'''
+
+
+def run(code, *args):
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    out = subprocess.check_output([sys.executable, '-c', code] + list(args),
+                                  cwd=ROOT, env=env)
+    return out.split()
+
+
+def main(repeat=10, target=TARGET_MS):
+    repeat, target = int(repeat), float(target)
+
+    # byte-compile phixlib and fill the dictionary cache first
+
+    run(PHIXLIB, *DEFERRED)
+
+    pkg_resources = min(float(run(PKG_RESOURCES)[0]) for _ in range(repeat))
+    samples = [run(PHIXLIB, *DEFERRED) for _ in range(repeat)]
+
+    imported = min(float(s[0]) for s in samples) * 1000
+    data = min(float(s[1]) for s in samples) * 1000
+    registered = min(float(s[2]) for s in samples) * 1000
+    deferred = set(m for s in samples for m in s[3].split(',') if m != '-')
+
+    print('import phixlib, by phase, best of %d' % (repeat, ))
+    print('  pkg_resources (unused):  %8.1f ms' % (pkg_resources * 1000, ))
+    print('  import phixlib:          %8.1f ms  (target %.1f ms)' % (imported, target))
+    print('  generators data:         %8.1f ms  (on first use)' % (data, ))
+    print('  registration (FIX.4.2):  %8.1f ms  (on first use)' % (registered, ))
+
+    failed = False
+    if imported > target:
+        print('FAIL: import phixlib took %.1f ms, over the %.1f ms target' % (
+            imported, target))
+        failed = True
+    if deferred:
+        print('FAIL: import phixlib loaded %s' % (', '.join(sorted(deferred)), ))
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv[1:]))
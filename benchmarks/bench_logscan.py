@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+'''
+Cost of scanning a FIX log with a pool of processes.
+
+The log is *count* representative FIX 4.2 and 4.4 messages (see
+bench_parser.py), one a line after a timestamp, as a session log is.
+
+lines
+    Reading the log line by line, and `phixlib.parser.parse_message` of
+    each message, in this process.
+
+reduce
+    `phixlib.logscan.reduce_log`, counting the messages by MsgType, with
+    1, 2, 4, ... processes up to one per CPU.
+
+scan
+    `phixlib.logscan.scan_log`, sending every message back, as a dict.
+
+Samples are for the whole log, best of *repeat* runs. Speedup is
+against a single process.
+
+    $ python benchmarks/bench_logscan.py [count] [repeat]
+
+'''
+from __future__ import print_function
+
+import itertools
+import multiprocessing
+import operator
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parser import MESSAGES
+from phixlib import FIX
+from phixlib.logscan import reduce_log, scan_log
+from phixlib.parser import parse_message
+
+
+def count_msg_type(counts, parts):
+    counts[parts['MsgType']] += 1
+    return counts
+
+
+def main(count=200000, repeat=3):
+    count, repeat = int(count), int(repeat)
+
+    raw = [str(FIX[version][name](**fields)) for version, name, fields in MESSAGES]
+    messages = itertools.islice(itertools.cycle(raw), count)
+
+    log_dir = tempfile.mkdtemp()
+    path = os.path.join(log_dir, 'session.log')
+
+    try:
+        with open(path, 'wb') as f:
+            for i, message in enumerate(messages):
+                f.write('20150406-18:23:24.%03d : %s\n' % (i % 1000, message))
+        size = os.path.getsize(path)
+
+        cpus = multiprocessing.cpu_count()
+        counts = sorted(set([1, cpus] + [2 ** i for i in range(cpus.bit_length()) if 2 ** i < cpus]))
+
+        print('scanning %d messages, %.1f MB, %d CPUs, best of %d' % (
+            count, size / 1e6, cpus, repeat))
+        print('  %-12s %10s %10s %8s' % ('', 'total', 'MB/s', 'speedup'))
+
+        def lines():
+            with open(path, 'rb') as f:
+                for line in f:
+                    parse_message(line[line.index('8=FIX'):-1])
+
+        t = min(timeit.repeat(lines, number=1, repeat=repeat))
+        print('  %-12s %8.3f s %10.1f' % ('lines', t, size / t / 1e6))
+
+        for name, scan in [
+                ('reduce', lambda n: reduce_log(path, count_msg_type, operator.add, Counter(),
+                                                processes=n)),
+                ('scan', lambda n: sum(1 for _ in scan_log(path, processes=n)))]:
+
+            base = None
+            for n in counts:
+                t = min(timeit.repeat(lambda: scan(n), number=1, repeat=repeat))
+                base = base or t
+
+                print('  %-12s %8.3f s %10.1f %7.2fx' % (
+                    '%s x%d' % (name, n), t, size / t / 1e6, base / t))
+    finally:
+        shutil.rmtree(log_dir)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
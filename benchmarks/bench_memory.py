@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+'''
+Memory used by phixlib.
+
+registry
+    Registers FIX42, FIX43 and FIX44 (in that order) with every message
+    type, then walks everything reachable from each version's registry:
+    its types, their class dicts, enum tables, field lists and so on.
+    Objects shared with a version reported earlier are not counted
+    again, so each line is what that version adds to the registry.
+
+messages
+    Bytes per parsed message: everything reachable from a message
+    returned by `FIXMessage.fromstring` (its header, trailer, fields,
+    groups, and their values), excluding the types they're instances
+    of. Also the growth of the maximum resident set size, per message,
+    while holding on to many of them.
+
+    $ python benchmarks/bench_memory.py [registry [version ...]]
+    $ python benchmarks/bench_memory.py [messages [count]]
+
+'''
+from __future__ import print_function
+
+import gc
+import os
+import random
+import subprocess
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from phixlib import FIX
+from phixlib import fix, generators
+
+
+# anything defined outside the registry is shared by every version, and
+# isn't what we're measuring
+
+STOP = (types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+        types.MethodType)
+
+BASES = (fix.Field, fix.Group, fix.FIXMessage, fix.FIXHeader,
+         fix.FIXTrailer, object, type)
+
+
+def sizeof(roots, seen):
+    size = objects = 0
+    pending = list(roots)
+
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, STOP) or obj in BASES:
+            continue
+        if isinstance(obj, type) and not isinstance(obj, fix.FIXMeta):
+            continue
+
+        size += sys.getsizeof(obj)
+        objects += 1
+        pending.extend(gc.get_referents(obj))
+
+    return size, objects
+
+
+def instances(obj):
+    # like sizeof, but every type is shared between messages
+    size = objects = 0
+    pending = [obj]
+    seen = set()
+
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, STOP + (type, )):
+            continue
+
+        size += sys.getsizeof(obj)
+        objects += 1
+        pending.extend(gc.get_referents(obj))
+
+    return size, objects
+
+
+def roots(version):
+    registry = FIX[version]
+    messages = registry.Messages.values()   # generate every message type
+    yield registry
+    yield registry.Fields
+    yield registry.Messages
+    for cls in messages:
+        yield cls
+
+
+def registry(*versions):
+    versions = versions or ('FIX.4.2', 'FIX.4.3', 'FIX.4.4')
+    seen = set()
+    total = 0
+
+    print('registry size per version, excluding what earlier versions share')
+    print('  %-10s %12s %10s %8s' % ('version', 'bytes', 'objects', 'types'))
+
+    for version in versions:
+        size, objects = sizeof(list(roots(version)), seen)
+        count = sum(1 for o in gc.get_objects() if isinstance(o, fix.FIXMeta)
+                    and o.__module__ == 'FIX.' + version.replace('.', ''))
+        total += size
+        print('  %-10s %12d %10d %8d' % (version, size, objects, count))
+
+    print('  %-10s %12d' % ('total', total))
+    print('distinct field definitions: %d' % (
+        len(getattr(FIX, '_definitions', ())), ))
+
+
+def sample(version, name):
+    # a message with every field initialized, as parsed off the wire;
+    # seed the generators so every run measures the same message
+    generators.random = random.Random(0)
+    cls = FIX[version][name]
+    message = cls()
+    message.initialize(optional=True)
+    return cls, str(message)
+
+
+HOLD = '''
+from __future__ import print_function
+import random
+import resource
+import sys
+from phixlib import FIX, generators
+
+version, name, count = sys.argv[1:]
+generators.random = random.Random(0)
+cls = FIX[version][name]
+message = cls()
+message.initialize(optional=True)
+message = str(message)
+
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+held = [cls.fromstring(message) for _ in range(int(count))]
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss)
+'''
+
+
+def messages(count=2000):
+    count = int(count)
+    samples = (('FIX.4.2', 'NewOrderSingle'), ('FIX.4.4', 'ExecutionReport'))
+
+    print('parsed message size, everything initialized')
+    print('  %-26s %8s %8s %8s %12s' % (
+        'message', 'fields', 'bytes', 'objects', 'RSS bytes'))
+
+    for version, name in samples:
+        cls, message = sample(version, name)
+        parsed = cls.fromstring(message)
+        size, objects = instances(parsed)
+        fields = sum(1 for _ in parsed)
+        rss = subprocess.check_output(
+            [sys.executable, '-c', HOLD, version, name, str(count)], cwd=ROOT)
+        print('  %-26s %8d %8d %8d %12d' % (
+            '%s %s' % (version, name), fields, size, objects,
+            int(rss) * 1024 / count))
+
+
+def main(which='all', *args):
+    if which == 'all':
+        registry()
+        messages()
+    elif which == 'registry':
+        registry(*args)
+    elif which == 'messages':
+        messages(*args)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+'''
+Cost of parsing representative FIX 4.2 and 4.4 messages.
+
+parse
+    `phixlib.parser.parse_message` of the raw message, as a str.
+
+buffer
+    The same, of the message in a bytearray, as read from a socket.
+
+tags
+    The same, of only the tags a router needs (see `ROUTING`).
+
+typed
+    The same, of every tag, with values converted to their spec types.
+
+fromstring
+    `FIXMessage.fromstring`, parsing the message and creating the
+    `FIXMessage` of it.
+
+Samples are per message, best of *repeat* runs of *number* parses.
+
+    $ python benchmarks/bench_parser.py [number] [repeat]
+
+'''
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from phixlib import FIX
+from phixlib.parser import parse_message
+
+
+HEADER = {
+    'SenderCompID': 'EXCHANGE',
+    'TargetCompID': 'GATEWAY01',
+    'MsgSeqNum': '4012',
+    'SendingTime': '20150406-18:23:24.391',
+}
+
+# MsgType, ClOrdID, OrderID, OrdStatus, ExecType, Symbol
+
+ROUTING = (35, 11, 37, 39, 150, 55)
+
+MESSAGES = [
+    ('FIX42', 'NewOrderSingle', dict(
+        HEADER, SenderCompID='GATEWAY01', TargetCompID='EXCHANGE',
+        ClOrdID='C00000012', Account='ACCT-000123', HandlInst='1',
+        Symbol='IBM', Side='1', TransactTime='20150406-18:23:24.381',
+        OrderQty='300', OrdType='2', Price='101.25', TimeInForce='0')),
+    ('FIX42', 'ExecutionReport', dict(
+        HEADER, OrderID='O123456', ClOrdID='C00000012', ExecID='E9876543',
+        ExecTransType='0', ExecType='2', OrdStatus='2', Symbol='IBM',
+        Side='1', OrderQty='300', Price='101.25', LastShares='300',
+        LastPx='101.25', LeavesQty='0', CumQty='300', AvgPx='101.25',
+        TransactTime='20150406-18:23:24.390')),
+    ('FIX44', 'MarketDataSnapshotFullRefresh', dict(
+        HEADER, Symbol='IBM', MDReqID='R1',
+        NoMDEntries=[{'MDEntryType': str(i % 2),
+                      'MDEntryPx': '101.%02d' % (20 + i),
+                      'MDEntrySize': str(100 * (i + 1))} for i in range(10)])),
+    ('FIX44', 'Heartbeat', HEADER),
+]
+
+
+def main(number=20000, repeat=5):
+    number, repeat = int(number), int(repeat)
+
+    print('parsing a message, per message, best of %d' % (repeat, ))
+    print('  %-36s %6s %11s %11s %11s %11s %11s' % ('message', 'fields', 'parse', 'buffer',
+                                                    'tags', 'typed', 'fromstring'))
+
+    for version, name, fields in MESSAGES:
+        cls = FIX[version][name]
+        raw = str(cls(**fields))
+        buf = bytearray(raw)
+        count = raw.count('\001')
+
+        assert parse_message(buf) == parse_message(raw)
+
+        samples = [
+            min(timeit.repeat(f, number=number, repeat=repeat)) / number
+            for f in (lambda: parse_message(raw),
+                      lambda: parse_message(buf),
+                      lambda: parse_message(raw, tags=ROUTING),
+                      lambda: parse_message(raw, typed=True),
+                      lambda: cls.fromstring(raw))]
+
+        print('  %-36s %6d' % ('%s %s' % (version, name), count) +
+              ' %8.2f us' * len(samples) % tuple(sample * 1e6 for sample in samples))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+'''
+FIX registry start up and registration costs.
+
+startup
+    Cold versus warm start. A cold start compiles each specification
+    from its XML and writes it to an empty dictionary cache. A warm
+    start reads the compiled dictionaries back from the cache.
+
+specs
+    For every bundled specification: the time to compile its XML, and
+    the time and number of types needed to register it and generate
+    every message type.
+
+Every sample runs in a fresh interpreter, as a short-lived worker would.
+
+    $ python benchmarks/bench_registry.py [startup|specs] [repeat]
+
+'''
+from __future__ import print_function
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP = '''
+from __future__ import print_function
+import time
+t = time.time()
+from phixlib import FIX
+FIX.FIX42, FIX.FIX43, FIX.FIX44
+print(time.time() - t)
+'''
+
+SPEC = '''
+from __future__ import print_function
+import sys
+import time
+from phixlib import FIX
+from phixlib.dictionary import load_dictionary
+from phixlib.fix import FIXMeta
+
+t = time.time()
+spec = load_dictionary(sys.argv[1], cache=False)
+compiled = time.time() - t
+
+created = [0]
+new = FIXMeta.__new__
+
+def counting(mcs, *args):
+    created[0] += 1
+    return new(mcs, *args)
+
+FIXMeta.__new__ = staticmethod(counting)
+
+t = time.time()
+FIX.register_version(sys.argv[1])
+FIX[spec['version']].Messages.values()
+registered = time.time() - t
+
+print(compiled, registered, created[0])
+'''
+
+
+def run(code, cache_dir, *args):
+    env = dict(os.environ, PHIXLIB_CACHE_DIR=cache_dir)
+    out = subprocess.check_output([sys.executable, '-c', code] + list(args),
+                                  cwd=ROOT, env=env)
+    return [float(x) for x in out.split()]
+
+
+def startup(repeat):
+    cold, warm = [], []
+
+    for _ in range(repeat):
+        cache_dir = tempfile.mkdtemp(prefix='phixlib-bench-')
+        try:
+            cold.extend(run(STARTUP, cache_dir))
+            warm.extend(run(STARTUP, cache_dir))
+        finally:
+            shutil.rmtree(cache_dir)
+
+    print('import phixlib and register FIX42/43/44, best of %d' % (repeat, ))
+    print('  cold (compile XML):   %8.1f ms' % (min(cold) * 1000, ))
+    print('  warm (cached):        %8.1f ms' % (min(warm) * 1000, ))
+    print('  speedup:              %8.2fx' % (min(cold) / min(warm), ))
+
+
+def specs(repeat):
+    directory = os.path.join(ROOT, 'phixlib', 'spec')
+    names = sorted(n for n in os.listdir(directory) if n.startswith('FIX'))
+
+    print('register every message of each bundled spec, best of %d' % (repeat, ))
+    print('  %-14s %12s %12s %10s' % ('spec', 'compile ms', 'register ms', 'types'))
+
+    cache_dir = tempfile.mkdtemp(prefix='phixlib-bench-')
+    try:
+        for name in names:
+            path = os.path.join(directory, name)
+            samples = [run(SPEC, cache_dir, path) for _ in range(repeat)]
+            print('  %-14s %12.1f %12.1f %10d' % (
+                name, min(s[0] for s in samples) * 1000,
+                min(s[1] for s in samples) * 1000, samples[0][2]))
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+def main(which='all', repeat=5):
+    repeat = int(repeat)
+    if which in ('all', 'startup'):
+        startup(repeat)
+    if which in ('all', 'specs'):
+        specs(repeat)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
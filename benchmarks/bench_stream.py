@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+'''
+Cost of decoding a stream of messages, as read from a socket.
+
+The stream is *count* representative FIX 4.2 and 4.4 messages (see
+bench_parser.py), some megabytes of them, fed to a `FIXStreamDecoder`
+*size* bytes at a time, so most reads end in the middle of a message.
+
+frame
+    Only framing the messages (`phixlib.parser.frame_message`).
+
+view
+    Decoding each message to a lazy `FIXMessageView`.
+
+fromstring
+    Decoding each message to a `FIXMessage`.
+
+Samples are for the whole stream, best of *repeat* runs.
+
+    $ python benchmarks/bench_stream.py [count] [size] [repeat]
+
+'''
+from __future__ import print_function
+
+import itertools
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parser import MESSAGES
+from phixlib import FIX
+from phixlib.stream import FIXStreamDecoder
+
+
+class Framer(FIXStreamDecoder):
+    # frames the messages, and decodes none of them
+    def _decode(self, data, start, end):
+        return end - start
+
+
+def main(count=20000, size=4096, repeat=3):
+    count, size, repeat = int(count), int(size), int(repeat)
+
+    raw = [str(FIX[version][name](**fields)) for version, name, fields in MESSAGES]
+    stream = ''.join(itertools.islice(itertools.cycle(raw), count))
+    reads = [stream[i:i + size] for i in xrange(0, len(stream), size)]
+
+    print('decoding %d messages, %.1f MB, in reads of %d bytes, best of %d' % (
+        count, len(stream) / 1e6, size, repeat))
+    print('  %-12s %10s %12s %10s' % ('', 'total', 'per message', 'MB/s'))
+
+    for name, decoder in [('frame', lambda: Framer()),
+                          ('view', lambda: FIXStreamDecoder(view=True)),
+                          ('fromstring', lambda: FIXStreamDecoder())]:
+
+        def decode():
+            d = decoder()
+            n = 0
+            for read in reads:
+                n += len(d.feed(read))
+            assert n == count and not len(d)
+
+        t = min(timeit.repeat(decode, number=1, repeat=repeat))
+
+        print('  %-12s %8.3f s %9.2f us %10.1f' % (
+            name, t, t / count * 1e6, len(stream) / t / 1e6))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
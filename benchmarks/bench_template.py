@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+'''
+Cost of formatting an order to send, with and without a template.
+
+message
+    Create the `FIXMessage` with every field, static and variable, and
+    format it with str(), as an order gateway would for each order.
+
+template
+    Format the same message from a `FIXTemplate` made once, with only
+    the variable fields given per send.
+
+Both are checked to produce the same message. Samples are per send,
+best of *repeat* runs of *number* sends.
+
+    $ python benchmarks/bench_template.py [number] [repeat]
+
+'''
+from __future__ import print_function
+
+import itertools
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from phixlib import FIX
+
+
+STATIC = {
+    'SenderCompID': 'GATEWAY01',
+    'TargetCompID': 'EXCHANGE',
+    'SenderSubID': 'DESK7',
+    'OnBehalfOfCompID': 'CLIENT42',
+    'Account': 'ACCT-000123',
+    'HandlInst': '1',
+    'Symbol': 'IBM',
+    'SecurityExchange': 'N',
+    'Side': '1',
+    'OrdType': '2',
+    'TimeInForce': '0',
+    'Currency': 'USD',
+    'Rule80A': 'A',
+}
+
+MESSAGES = {
+    'NewOrderSingle': ('MsgSeqNum', 'SendingTime', 'ClOrdID', 'TransactTime',
+                       'Price', 'OrderQty'),
+    'OrderCancelRequest': ('MsgSeqNum', 'SendingTime', 'ClOrdID',
+                           'OrigClOrdID', 'TransactTime', 'OrderQty'),
+}
+
+
+VALUES = {
+    'MsgSeqNum': str,
+    'SendingTime': lambda n: '20150406-18:23:%02d.%03d' % (n // 1000 % 60, n % 1000),
+    'TransactTime': lambda n: '20150406-18:23:%02d.%03d' % (n // 1000 % 60, n % 1000),
+    'ClOrdID': lambda n: 'C%08d' % (n, ),
+    'OrigClOrdID': lambda n: 'C%08d' % (n - 1, ),
+    'Price': lambda n: '%d.%02d' % (100 + n % 50, n % 100),
+    'OrderQty': lambda n: str(100 * (1 + n % 9)),
+}
+
+
+def values(variables):
+    # a new set of values for every send
+    for n in itertools.count(1):
+        yield dict((name, VALUES[name](n)) for name in variables)
+
+
+def main(number=20000, repeat=5):
+    number, repeat = int(number), int(repeat)
+
+    print('formatting an order, per send, best of %d' % (repeat, ))
+    print('  %-20s %12s %12s %8s' % ('message', 'message', 'template', 'speedup'))
+
+    for name, variables in sorted(MESSAGES.items()):
+        cls = FIX.FIX42[name]
+        fields = dict((k, v) for k, v in STATIC.items() if k in cls._all
+                      or k in cls.Header._all)
+        template = cls.template(*variables, **fields)
+
+        sample = next(values(variables))
+        assert template.format(**sample) == str(cls(**dict(fields, **sample)))
+
+        sends = values(variables)
+        message = lambda: str(cls(**dict(fields, **next(sends))))
+        templated = lambda: template.format(**next(sends))
+
+        m = min(timeit.repeat(message, number=number, repeat=repeat)) / number
+        t = min(timeit.repeat(templated, number=number, repeat=repeat)) / number
+
+        print('  %-20s %9.2f us %9.2f us %7.1fx' % (name, m * 1e6, t * 1e6, m / t))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
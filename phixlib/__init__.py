@@ -62,13 +62,32 @@ Getting and setting fields in the message:
     11=C12345|
 
 '''
-from pkg_resources import resource_string
+from functools import partial
+from pkgutil import get_data
 from .fix import FIX, Field, Group
 
 
 __all__ = ['FIX']
 
 
-FIX.register_version(resource_string(__name__, 'spec/FIX42.xml'))
-FIX.register_version(resource_string(__name__, 'spec/FIX43.xml'))
-FIX.register_version(resource_string(__name__, 'spec/FIX44.xml'))
+# Bundled specifications are only read and registered the first time
+# their version is accessed, e.g. FIX.FIX44 or FIX['FIX.5.0SP2']. Read
+# them with pkgutil rather than pkg_resources, which takes longer to
+# import than the rest of phixlib does.
+
+SPECS = {
+    'FIX.4.0': 'spec/FIX40.xml',
+    'FIX.4.1': 'spec/FIX41.xml',
+    'FIX.4.2': 'spec/FIX42.xml',
+    'FIX.4.3': 'spec/FIX43.xml',
+    'FIX.4.4': 'spec/FIX44.xml',
+    'FIX.5.0': 'spec/FIX50.xml',
+    'FIX.5.0SP1': 'spec/FIX50SP1.xml',
+    'FIX.5.0SP2': 'spec/FIX50SP2.xml',
+    'FIXT.1.1': 'spec/FIXT11.xml',
+}
+
+for version, path in SPECS.iteritems():
+    FIX.defer_version(version, partial(get_data, __name__, path))
+
+del version, path
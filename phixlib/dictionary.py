@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+'''
+phixlib.dictionary
+~~~~~~~~~~~~~~~~~~
+
+This module compiles a FIX data dictionary (a specification) into plain
+Python data: tuples, lists, and dicts of strings. `FIXRegistry` uses the
+compiled dictionary to generate `Field`, `Group`, and `Message` types
+without having to walk the XML again.
+
+Compiled dictionaries are cached on disk, keyed by a hash of the XML
+content, so a specification is only parsed the first time it is seen.
+If the specification changes, so does its hash, and the dictionary is
+compiled again. The cache lives in ``$PHIXLIB_CACHE_DIR``, falling back
+to ``$XDG_CACHE_HOME/phixlib`` (``~/.cache/phixlib``).
+
+    >>> from phixlib.dictionary import load_dictionary
+    >>> spec = load_dictionary('FIX42.xml')
+    >>> spec['version']
+    'FIX.4.2'
+
+'''
+from cStringIO import StringIO
+from hashlib import sha1
+import marshal
+import os
+import sys
+
+# ElementTree and tempfile are only imported when a dictionary has to
+# be compiled and cached, not when it's read back from the cache.
+
+
+__all__ = ['compile_dictionary', 'load_dictionary']
+
+
+# Bump this whenever the layout of a compiled dictionary changes, so
+# stale cache entries are never read back.
+
+CACHE_VERSION = 2
+
+
+def compile_dictionary(source):
+    '''
+    Compile a FIX data dictionary, read from *source* (a path or file
+    object), into a dict::
+
+        {'version': 'FIX.4.2',
+         'fields': [(attrib, [(enum, description), ...]), ...],
+         'components': {name: children, ...},
+         'header': children,
+         'trailer': children,
+         'messages': [(attrib, children), ...]}
+
+    where *children* is a list of ``(tag, name, required, children)``
+    tuples, *tag* being one of field, group, or component. Components
+    are kept by reference and expanded when the types are generated.
+
+    The XML is parsed incrementally: every field, component, message,
+    header and trailer is discarded as soon as it is compiled, so the
+    whole document is never held in memory at once.
+    '''
+    def children(element):
+        members = []
+        for child in element:
+            if child.tag not in ('field', 'group', 'component'):
+                continue
+            name = child.get('name')
+            required = True if child.get('required') == 'Y' else False
+            nested = children(child) if child.tag == 'group' else None
+            members.append((child.tag, name, required, nested))
+        return members
+
+    def strip(attrib):
+        return dict((k.strip(), v.strip()) for k, v in attrib.iteritems())
+
+    spec = {
+        'version': None,
+        'fields': [],
+        'components': {},
+        'header': None,
+        'trailer': None,
+        'messages': [],
+    }
+
+    try:
+        from xml.etree import cElementTree as ElementTree
+    except ImportError:
+        from xml.etree import ElementTree
+
+    # stack of the elements currently open, the root <fix> first
+
+    stack = []
+
+    for event, element in ElementTree.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if not stack:
+                spec['version'] = _version(element)
+            stack.append(element)
+            continue
+
+        stack.pop()
+
+        if len(stack) == 2:
+            section = stack[-1].tag
+
+            if section == 'fields' and element.tag == 'field':
+                enums = [(v.get('enum'), v.get('description')) for v in
+                         element.findall('./value')]
+                spec['fields'].append((strip(element.attrib), enums))
+
+            elif section == 'components' and element.tag == 'component':
+                spec['components'][element.get('name')] = children(element)
+
+            elif section == 'messages' and element.tag == 'message':
+                spec['messages'].append((strip(element.attrib), children(element)))
+
+            else:
+                continue
+
+            stack[-1].clear()
+
+        elif len(stack) == 1:
+            if element.tag in ('header', 'trailer'):
+                spec[element.tag] = children(element)
+            stack[-1].clear()
+
+    return spec
+
+
+def load_dictionary(xmlfile, cache=True):
+    '''
+    Return the compiled dictionary for *xmlfile*, which may be the XML
+    itself, a path, or a file object.
+
+    :param cache: If True, look the dictionary up in the on-disk cache
+        before compiling it, and store it there afterwards.
+    '''
+    if isinstance(xmlfile, basestring) and xmlfile.startswith('<'):
+        content = xmlfile
+    elif not cache:
+        return compile_dictionary(xmlfile)
+    elif isinstance(xmlfile, basestring):
+        with open(xmlfile, 'rb') as f:
+            content = f.read()
+    else:
+        content = xmlfile.read()
+
+    path = _cache_path(content) if cache else None
+
+    if path is not None:
+        spec = _read_cache(path)
+        if spec is not None:
+            return spec
+
+    spec = compile_dictionary(StringIO(content))
+
+    if path is not None:
+        _write_cache(path, spec)
+
+    return spec
+
+
+def cache_dir():
+    '''
+    Directory compiled dictionaries are cached in.
+    '''
+    path = os.environ.get('PHIXLIB_CACHE_DIR')
+    if not path:
+        base = os.environ.get('XDG_CACHE_HOME') or \
+            os.path.join(os.path.expanduser('~'), '.cache')
+        path = os.path.join(base, 'phixlib')
+    return path
+
+
+def _version(root):
+    # service packs share a major and minor version (FIX.5.0SP2), so
+    # tell them apart by appending the service pack
+
+    version = "{type}.{major}.{minor}".format(**root.attrib)
+    if root.get('servicepack', '0') != '0':
+        version += 'SP' + root.get('servicepack')
+    return version
+
+
+def _cache_path(content):
+    # marshal's format is only stable within a Python version, so it
+    # is part of the key along with the layout version.
+
+    key = sha1('%d:%d.%d:' % ((CACHE_VERSION, ) + sys.version_info[:2]))
+    key.update(content)
+    return os.path.join(cache_dir(), key.hexdigest() + '.marshal')
+
+
+def _read_cache(path):
+    try:
+        with open(path, 'rb') as f:
+            return marshal.load(f)
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _write_cache(path, spec):
+    # write to a temporary file first and rename it into place, so
+    # concurrent workers never observe a partially written entry
+
+    import tempfile
+
+    directory = os.path.dirname(path)
+    tmp = None
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump(spec, f)
+        os.rename(tmp, path)
+    except (IOError, OSError):
+        # don't leave the partially written entry behind
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
@@ -10,9 +10,9 @@ other than FIX. Only use these classes if you know what you're doing.
 
 '''
 from collections import OrderedDict
-from itertools import imap, izip_longest
-from xml.etree import ElementTree
+from itertools import count, imap, izip, izip_longest
 
+from .dictionary import load_dictionary
 from .generators import GENERATORS
 
 
@@ -25,6 +25,178 @@ class AttrDict(dict):
         self.__dict__ = self
 
 
+class LazyAttrDict(AttrDict):
+    '''
+    An `AttrDict` whose values can be deferred to a factory, which is
+    only called the first time the key is looked up. The factory must
+    store the value (under the key, and any aliases) itself.
+
+    Iterating over a `LazyAttrDict` calls every pending factory first.
+    '''
+
+    __slots__ = ('_pending', )
+
+    def __init__(self, *args, **kwargs):
+        super(LazyAttrDict, self).__init__(*args, **kwargs)
+        self._pending = {}
+
+    def __missing__(self, key):
+        if self._materialize(key):
+            return self[key]
+        raise KeyError(key)
+
+    def __getattr__(self, name):
+        if self._materialize(name):
+            return self[name]
+        raise AttributeError(name)
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._pending
+
+    def __setitem__(self, key, value):
+        self._pending.pop(key, None)
+        dict.__setitem__(self, key, value)
+
+    def __iter__(self):
+        self._materialize_all()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._materialize_all()
+        return dict.__len__(self)
+
+    def __nonzero__(self):
+        return dict.__len__(self) > 0 or len(self._pending) > 0
+
+    def get(self, key, default=None):
+        if not dict.__contains__(self, key):
+            self._materialize(key)
+        return dict.get(self, key, default)
+
+    def defer(self, key, factory):
+        if not dict.__contains__(self, key):
+            self._pending[key] = factory
+
+    def _materialize(self, key):
+        try:
+            factory = self._pending.pop(key)
+        except (KeyError, TypeError):
+            return False
+        factory()
+        return dict.__contains__(self, key)
+
+    def _materialize_all(self):
+        while self._pending:
+            self._materialize(next(iter(self._pending)))
+
+    def _iterate(method):
+        def wrapper(self, *args, **kwargs):
+            self._materialize_all()
+            return method(self, *args, **kwargs)
+        wrapper.__name__ = method.__name__
+        return wrapper
+
+    keys = _iterate(dict.keys)
+    values = _iterate(dict.values)
+    items = _iterate(dict.items)
+    iterkeys = _iterate(dict.iterkeys)
+    itervalues = _iterate(dict.itervalues)
+    iteritems = _iterate(dict.iteritems)
+
+    del _iterate
+
+
+class TagTable(object):
+    '''
+    Field types of a FIX version by tag number. Tags may be looked up
+    as int or str, e.g. ``Fields[55]`` or ``Fields['55']``.
+
+    The tags defined by the FIX specifications are dense and below
+    5000, so they index a list directly. User-defined tags (5000 and
+    above) are kept in a dict on the side.
+    '''
+
+    __slots__ = ('_dense', '_sparse')
+
+    USER_DEFINED = 5000
+
+    def __init__(self):
+        self._dense = []
+        self._sparse = {}
+
+    def __getitem__(self, tag):
+        try:
+            field = self._dense[tag]
+        except (IndexError, TypeError):
+            field = self._lookup(tag)
+        else:
+            if tag < 0:
+                field = None
+        if field is None:
+            raise KeyError(tag)
+        return field
+
+    def __setitem__(self, tag, field):
+        tag = int(tag)
+        if tag < 0:
+            raise KeyError(tag)
+        if tag >= self.USER_DEFINED:
+            self._sparse[tag] = field
+            return
+        if tag >= len(self._dense):
+            self._dense.extend([None] * (tag + 1 - len(self._dense)))
+        self._dense[tag] = field
+
+    def __contains__(self, tag):
+        return self.get(tag) is not None
+
+    def __iter__(self):
+        for tag, field in enumerate(self._dense):
+            if field is not None:
+                yield tag
+        for tag in sorted(self._sparse):
+            yield tag
+
+    def __len__(self):
+        return len(self._dense) - self._dense.count(None) + len(self._sparse)
+
+    def __repr__(self):
+        return '<TagTable: %d fields>' % (len(self), )
+
+    def get(self, tag, default=None):
+        try:
+            return self[tag]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self)
+
+    def itervalues(self):
+        for tag in self:
+            yield self[tag]
+
+    def iteritems(self):
+        for tag in self:
+            yield tag, self[tag]
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+    def _lookup(self, tag):
+        # str tags, and tags past the end of the list
+        try:
+            tag = int(tag)
+        except (TypeError, ValueError):
+            return None
+        if 0 <= tag < len(self._dense):
+            return self._dense[tag]
+        return self._sparse.get(tag)
+
+
 class FIXRegistry(AttrDict):
     '''
     Do not initialize this class yourself. To use this class, do:
@@ -34,6 +206,9 @@ class FIXRegistry(AttrDict):
     '''
 
     _versions = set()
+    _deferred = {}
+    _definitions = {}
+    _enums = {}
 
     def __repr__(self):
         versions = sorted(list(self._versions))
@@ -43,7 +218,87 @@ class FIXRegistry(AttrDict):
         else:
             return "<FIXRegistry>"
 
-    def register_version(self, xmlfile):
+    def __missing__(self, key):
+        if self._load_deferred(key):
+            return self[key]
+        raise KeyError(key)
+
+    def __getattr__(self, name):
+        if self._load_deferred(name):
+            return self[name]
+        raise AttributeError(name)
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._deferred
+
+    def get(self, key, default=None):
+        if not dict.__contains__(self, key):
+            self._load_deferred(key)
+        return dict.get(self, key, default)
+
+    def defer_version(self, version, xmlfile):
+        '''
+        Make *version* known to the registry without reading its data
+        dictionary. The version is registered from *xmlfile* (anything
+        `register_version` accepts, or a callable returning it) the
+        first time it is accessed.
+
+        >>> FIX.defer_version('FIX.4.2', 'FIX42.xml')
+
+        >>> 'FIX42' in FIX
+        True
+
+        >>> FIX.FIX42.NewOrderSingle    # FIX42.xml is registered here
+        <class 'FIX.FIX42.NewOrderSingle'>
+
+        Note, all the specifications bundled with phixlib are deferred
+        this way when phixlib is imported.
+        '''
+        if dict.__contains__(self, version):
+            return
+        self._deferred[version] = xmlfile
+        self._deferred[version.replace('.', '')] = xmlfile
+
+    def _load_deferred(self, key):
+        try:
+            xmlfile = self._deferred[key]
+        except (KeyError, TypeError):
+            return False
+
+        if callable(xmlfile):
+            xmlfile = xmlfile()
+
+        self.register_version(xmlfile)
+        return True
+
+    def _define(self, attrib, enums):
+        '''
+        Return the version-less type defining a field: its name, number,
+        type, enums, and value generator. Most fields are defined the
+        same way by every FIX version, so each version's field type is a
+        thin subclass (carrying just the version) of a definition shared
+        with every other version defining it identically.
+        '''
+        enums = tuple(map(tuple, enums))
+        key = (tuple(sorted(attrib.iteritems())), enums)
+
+        try:
+            return self._definitions[key]
+        except KeyError:
+            pass
+
+        # different fields often share an enum table too (Y/N, Side...)
+
+        try:
+            table = self._enums[enums]
+        except KeyError:
+            table = self._enums.setdefault(enums, OrderedDict(enums))
+
+        definition = type(attrib['name'], (Field, ),
+                          dict(attrib, enums=table, __module__=__name__))
+        return self._definitions.setdefault(key, definition)
+
+    def register_version(self, xmlfile, cache=True):
         '''
         Read a FIX data dictionary (a specification), and generate
         `Field`, `Group`, and `Message` types. These types are then
@@ -57,95 +312,186 @@ class FIXRegistry(AttrDict):
         >>> FIX['FIX.4.2']['NewOrderSingle']
         <class 'FIX.FIX42.NewOrderSingle'>
 
-        Note, the following are registered automatically:
+        The specification is compiled once and cached on disk, keyed by
+        a hash of its content (see `phixlib.dictionary`). Pass
+        ``cache=False`` to always compile it from the XML.
 
-            * FIX42.xml
-            * FIX43.xml
-            * FIX44.xml
+        Note, you only need to do this for your own specifications.
+        The ones bundled with phixlib are registered the first time
+        they are accessed (see `defer_version`).
 
         '''
-        def iterchildren(element, version):
-            for child in element:
-                name = child.get('name')
-                required = True if child.get('required') == 'Y' else False
-
-                if child.tag == 'field':
-                    field = FIXMeta._registry[version].get(name)
-                    attrib = field.__dict__.copy()
-                    attrib.update(required=required)
+        def iterchildren(children, version):
+            for tag, name, required, members in children:
 
-                    # __mro__ ends up looking like:
-                    #
-                    # Tag, Tag, Field, object, type
-                    #
-                    # however Tag above is two distinct id's, this one
-                    # and the one retrieved from the registry
+                if tag == 'field':
+                    yield subclass(name, required)
 
-                    yield type(name, (field, ), attrib)
-
-                elif child.tag == 'group':
+                elif tag == 'group':
                     fields = OrderedDict()
-                    fields.update((f.name, f) for f in iterchildren(child, version))
-
-                    group = FIXMeta._registry[version].get(name)
-                    attrib = group.__dict__.copy()
-                    attrib.update(required=required, _all=fields)
+                    fields.update((f.name, f) for f in iterchildren(members, version))
+                    yield subclass(name, required, fields)
 
-                    # __mro__ = Tag, Group, Tag, Field, object, type
-
-                    yield type(name, (Group, group, ), attrib)
-
-                elif child.tag == 'component':
+                elif tag == 'component':
                     # Components are just fields, groups, and other
                     # components. Simply expand them as we encounter them.
                     # Note, we don't actually parse out Component objects.
-                    path = "./components/component[@name='{0}']".format(name)
-                    component = root.find(path)
-                    for f in iterchildren(component, version):
+                    for f in expand(name):
                         yield f
 
-        if isinstance(xmlfile, basestring) and xmlfile.startswith('<'):
-            root = ElementTree.fromstring(xmlfile)
-
-        elif isinstance(xmlfile, (basestring, file)) or xmlfile.endswith('.xml'):
-            root = ElementTree.parse(xmlfile).getroot()
-
-        version = "{type}.{major}.{minor}".format(**root.attrib)
-
-        for field in root.findall('./fields/field'):
-            name = field.get('name')
-            enums = OrderedDict((v.get('enum'), v.get('description')) for v in
-                                field.findall('./value'))
-            attrib = {k.strip(): v.strip() for k, v in field.attrib.iteritems()}
-            attrib.update(enums=enums, version=version)
-            cls = type(name, (Field, ), attrib)
-
-        for field in root.findall('./header'):
-            fields = OrderedDict((f.name, f) for f in iterchildren(field, version))
+        def subclass(name, required, fields=None):
+            # The same field (or group of the same fields) is required,
+            # or not, by many messages; they can all share one type.
+            #
+            # __mro__ ends up looking like:
+            #
+            # Tag, Tag, Tag, Field, object
+            #
+            # this Tag, the one retrieved from the registry, and the
+            # definition shared between versions (see `_define`).
+            # Groups are Tag, Group, Tag, Tag, Field, object.
+
+            field = FIXMeta._registry[version].get(name)
+            key = (name, required) if fields is None else \
+                (name, required, tuple(fields.itervalues()))
+
+            try:
+                return subclasses[key]
+            except KeyError:
+                pass
+
+            attrib = {'required': required, 'version': version}
+            if fields is None:
+                cls = type(name, (field, ), attrib)
+            else:
+                attrib.update(_all=fields)
+                cls = type(name, (Group, field, ), attrib)
+            return subclasses.setdefault(key, cls)
+
+        def expand(name):
+            # A component expands to the same types wherever it's
+            # used, so do it once per version and share the result
+            # between every message (and component) referencing it.
+            try:
+                return expanded[name]
+            except KeyError:
+                fields = tuple(iterchildren(components[name], version))
+                return expanded.setdefault(name, fields)
+
+        spec = load_dictionary(xmlfile, cache=cache)
+        version = spec['version']
+        components = spec['components']
+        expanded = {}
+        subclasses = {}
+
+        # registering a version by hand supersedes deferring it
+
+        self._deferred.pop(version, None)
+        self._deferred.pop(version.replace('.', ''), None)
+
+        for attrib, enums in spec['fields']:
+            definition = self._define(attrib, enums)
+            cls = type(attrib['name'], (definition, ), {'version': version})
+
+        if spec['header'] is not None:
+            fields = OrderedDict((f.name, f) for f in iterchildren(spec['header'], version))
             attrib = {'_all': fields, 'version': version}
             cls = type('Header', (FIXHeader, ), attrib)
 
-        for field in root.findall('./trailer'):
-            fields = OrderedDict((f.name, f) for f in iterchildren(field, version))
+        if spec['trailer'] is not None:
+            fields = OrderedDict((f.name, f) for f in iterchildren(spec['trailer'], version))
             attrib = {'_all': fields, 'version': version}
             cls = type('Trailer', (FIXTrailer, ), attrib)
 
-        for message in root.findall('./messages/message'):
-            name = message.get('name')
-            fields = OrderedDict((f.name, f) for f in iterchildren(message, version))
-            attrib = {k.strip(): v.strip() for k, v in message.attrib.iteritems()}
-            attrib.update(_all=fields, version=version)
-            cls = type(name, (FIXMessage, ), attrib)
+        # Message types are only generated (and their components
+        # expanded) once they are looked up by name or MsgType.
+
+        def message(attrib, children):
+            def factory():
+                fields = OrderedDict((f.name, f) for f in iterchildren(children, version))
+                return type(attrib['name'], (FIXMessage, ),
+                            dict(attrib, _all=fields, version=version))
+            return factory
+
+        registry = dict.__getitem__(self, version)
+        messages = registry.get('Messages')
+        if messages is None:
+            messages = registry['Messages'] = LazyAttrDict()
+
+        for attrib, children in spec['messages']:
+            factory = message(attrib, children)
+            registry.defer(attrib['name'], factory)
+            messages.defer(attrib['name'], factory)
+            messages.defer(attrib['msgtype'], factory)
+
+    def register_session(self, transport, applications, default=None):
+        '''
+        Combine a transport (session) dictionary, such as FIXT.1.1, with
+        one or more application dictionaries carried over it.
+
+        >>> FIX.register_session('FIXT.1.1', ['FIX.5.0SP2', 'FIX.5.0SP1'])
+
+        The application dictionaries share the transport's header and
+        trailer. Messages with a BeginString of the transport are then
+        looked up in the transport dictionary first (session messages,
+        such as Logon), and in the application dictionary named by the
+        message's ApplVerID otherwise, falling back to the session's
+        default application (kept under `None`):
+
+        >>> FIX.FIXT11.Applications['9'] is FIX.FIX50SP2
+        True
+
+        >>> FIX.FIXT11.Applications[None] is FIX.FIX50SP2
+        True
+
+        >>> type(FIX.FIXMessage.fromstring('8=FIXT.1.1|9=..|35=D|1128=8|...'))
+        <class 'FIX.FIX50SP1.NewOrderSingle'>
+
+        :param transport: The transport version, e.g. 'FIXT.1.1'.
+        :param applications: Application versions, e.g. 'FIX.5.0SP2'.
+        :param default: The application version assumed for messages
+            without an ApplVerID. Defaults to the first application.
+        '''
+        transport = self[transport]
+
+        # the transport defines which ApplVerID names which version
+
+        appl_ver_ids = dict((description, enum) for enum, description in
+                            transport.ApplVerID.enums.iteritems())
+
+        if transport.get('Applications') is None:
+            transport['Applications'] = AttrDict()
+            transport['HeaderTags'] = frozenset(
+                int(field.number) for field in _flatten_types(transport.Header))
+
+        for version in applications:
+            registry = self[version]
+            appl_ver_id = appl_ver_ids[version.replace('.', '')]
+            transport.Applications[appl_ver_id] = registry
+
+            registry['Header'] = transport.Header
+            registry['Trailer'] = transport.Trailer
+
+            # message types generated from here on pick them up from the
+            # registry, update the ones generated already
+
+            for cls in [registry.FIXMessage] + dict.values(registry.Messages):
+                cls.Header = transport.Header
+                cls.Trailer = transport.Trailer
+
+        transport.Applications[None] = self[default or applications[0]]
 
     def get_field_number(self, field, version='FIX.4.2'):
         try:
+            if str(field).isdigit():
+                return self[version].Fields[field].number
             return self[version][str(field)].number
         except KeyError:
             pass
 
     def get_field_name(self, field, version='FIX.4.2'):
         try:
-            return self[version].Fields[str(field)].name
+            return self[version].Fields[field].name
         except KeyError:
             pass
 
@@ -163,6 +509,7 @@ class FIXRegistry(AttrDict):
 
 class FIXMeta(type):
     _registry = FIXRegistry()
+    _generators = {}
 
     def __new__(mcs, name, bases, d):
         _registry = FIXMeta._registry
@@ -172,8 +519,11 @@ class FIXMeta(type):
 
         basenames = [base.__name__ for base in bases]
 
+        # Index them by tag number as well, _all already does by name.
+
         if set(['FIXMessage', 'FIXHeader', 'FIXTrailer', 'Group']) & set(basenames):
             d.update(dict(d.get('_all', {})))
+            d['_numbers'] = dict((f.number, f) for f in d.get('_all', {}).itervalues())
 
         # Set enums as class attributes, should only apply to fields...
 
@@ -181,17 +531,24 @@ class FIXMeta(type):
 
         if 'Field' in basenames and 'Group' not in basenames:
             if name in GENERATORS:
-                method = classmethod(GENERATORS[name])
-                d['generate_value'] = method
+                d['generate_value'] = mcs._generator(name)
             elif 'type' in d and d['type'] in GENERATORS:
-                method = classmethod(GENERATORS[d['type']])
-                d['generate_value'] = method
+                d['generate_value'] = mcs._generator(d['type'])
+
+        # Field and Group keep their instances compact (see Field), so
+        # must every type generated from them. A group type is the
+        # first one to add a slot of its own, as Group can't add any
+        # next to Field's.
+
+        if '__slots__' not in d:
+            d['__slots__'] = ('_initialized', ) if 'Group' in basenames else ()
 
         if name == 'FIXMessage':
             d['msgtype'] = None
             d['msgcat'] = None
             d['name'] = None
             d['_all'] = OrderedDict()
+            d['_numbers'] = {}
             d['__module__'] = 'FIX.FIX42'
 
             new_class = super(FIXMeta, mcs).__new__(mcs, name, bases, d)
@@ -204,14 +561,22 @@ class FIXMeta(type):
         else:
             new_class = super(FIXMeta, mcs).__new__(mcs, name, bases, d)
 
+        # The base classes defined in this module don't belong to any
+        # FIX version, don't let them claim the default one.
+
+        if 'version' not in d and d.get('__module__') == __name__:
+            return new_class
+
         version = d.pop('version', 'FIX.4.2')
         _registry._versions.add(version.replace('.', ''))
 
         # register both dotted and dot-less notation of the FIX version
         # so we can call both FIX.FIX42 and FIX['FIX.4.2'].
 
-        registry = _registry.setdefault(version, AttrDict())
-        registry = _registry.setdefault(version.replace('.', ''), registry)
+        registry = _registry.get(version)
+        if registry is None:
+            registry = _registry.setdefault(version, LazyAttrDict())
+            registry = _registry.setdefault(version.replace('.', ''), registry)
 
         # Only register fields in the registry, not fields defined in a message
         # or repeating tag. This has a side effect that you can't specifically
@@ -219,7 +584,7 @@ class FIXMeta(type):
         # registry. Instead, you would do something like:
         # FIX.FIX42.NewOrderSingle.OrdType
 
-        if name not in registry:
+        if not dict.__contains__(registry, name):
             registry[name] = new_class
 
         if 'FIXMessage' in _registry and 'FIXMessage' not in registry:
@@ -230,30 +595,42 @@ class FIXMeta(type):
                 })
             registry['FIXMessage'] = cls
 
-        if 'Field' in basenames:
-            fields = registry.setdefault('Fields', AttrDict())
+        # A version's own fields derive from Field, or from a definition
+        # shared between versions (see FIXRegistry._define), both of
+        # which live in this module.
+
+        if bases[0].__module__ == __name__ and issubclass(new_class, Field) \
+                and not issubclass(new_class, Group):
+            fields = registry.get('Fields')
+            if fields is None:
+                fields = registry['Fields'] = TagTable()
             fields[new_class.number] = new_class
-            fields[int(new_class.number)] = new_class
 
         if 'FIXMessage' in basenames:
             new_class.Header = _registry[version].Header
             new_class.Trailer = _registry[version].Trailer
 
-            messages = registry.setdefault('Messages', AttrDict())
+            messages = registry.get('Messages')
+            if messages is None:
+                messages = registry['Messages'] = LazyAttrDict()
             messages[name] = new_class
             messages[new_class.msgtype] = new_class
 
         if name in ('Header', 'Trailer') and 'FIXMessage' in _registry[version]:
             setattr(_registry[version].FIXMessage, name, new_class)
-            if not hasattr(_registry.FIXMessage, 'Header'):
-                setattr(_registry.FIXMessage, name, new_class)
-            if not hasattr(_registry.FIXMessage, 'Trailer'):
-                setattr(_registry.FIXMessage, name, new_class)
 
         setattr(new_class, '__module__', 'FIX.' + version.replace('.', ''))
 
         return new_class
 
+    @classmethod
+    def _generator(mcs, key):
+        # bind each generator once, rather than once per field type
+        try:
+            return mcs._generators[key]
+        except KeyError:
+            return mcs._generators.setdefault(key, classmethod(GENERATORS[key]))
+
     def __call__(cls, *args, **kwargs):
         '''
         If user calls FIX.FIX42.FIXMessage() and they supply a valid
@@ -266,24 +643,220 @@ class FIXMeta(type):
         <class 'FIX.FIX44.NewOrderSingle'>
         '''
 
+        cls = cls._message_type(kwargs)
+        return super(FIXMeta, cls).__call__(*args, **kwargs)
+
+    def _message_type(cls, kwargs):
+        # the message type a FIXMessage with *kwargs* is created as
         if cls.__name__ == 'FIXMessage' and 'MsgType' in kwargs:
             version = kwargs.get('BeginString', cls.__module__[4:])
             _registry = FIXMeta._registry
-            _registry = _registry.get(version, _registry.get('FIX.4.2'))
+            _registry = _registry.get(version) or _registry['FIX.4.2']
+            _registry = _dispatch(_registry, kwargs['MsgType'], kwargs.get('ApplVerID'))
             cls = _registry.Messages.get(kwargs['MsgType'], cls)
-        return super(FIXMeta, cls).__call__(*args, **kwargs)
+        return cls
+
+    def __getattr__(cls, name):
+        '''
+        The base FIX.FIXMessage borrows its Header and Trailer from the
+        FIX version it defaults to, registering that version if needed.
+        '''
+        _registry = FIXMeta._registry
+        if name in ('Header', 'Trailer') and cls is dict.get(_registry, 'FIXMessage'):
+            return getattr(_registry[cls.__module__[4:]].FIXMessage, name)
+        raise AttributeError(name)
 
 
 FIX = FIXMeta._registry
 
 
+def _dispatch(registry, msgtype, appl_ver_id=None):
+    '''
+    Return the registry defining *msgtype*. Under a transport (see
+    `FIXRegistry.register_session`), application messages are defined
+    by the application registry named by *appl_ver_id*, or the
+    session's default application.
+    '''
+    applications = dict.get(registry, 'Applications')
+    if applications is None or msgtype in registry.Messages:
+        return registry
+    return applications.get(appl_ver_id) or applications[None]
+
+
+class FieldStore(OrderedDict):
+    '''
+    The fields initialized in a message, header, or trailer, keyed by
+    name (in the order they were initialized). `numbers` maps the tag
+    number of each field to its name.
+
+    Fields set in the store belong to its *owner*, which is told
+    whenever a field is set or removed (see `FIXMixIn._update`). A
+    field set in more than one store belongs to each of their owners.
+    '''
+
+    def __init__(self, owner=None):
+        self.numbers = {}
+        self.owner = owner
+        super(FieldStore, self).__init__()
+
+    def __setitem__(self, name, field, *args):
+        old = self.get(name)
+        OrderedDict.__setitem__(self, name, field, *args)
+        self.numbers[field.number] = name
+        if old is not None and old is not field:
+            _disown(old, self.owner)
+        _adopt(field, self.owner)
+        self._changed(name, old, field)
+
+    def __delitem__(self, name, *args):
+        old = self[name]
+        OrderedDict.__delitem__(self, name, *args)
+        if self.numbers.get(old.number) == name:
+            del self.numbers[old.number]
+        _disown(old, self.owner)
+        self._changed(name, old, None)
+
+    def clear(self):
+        for field in self.itervalues():
+            _disown(field, self.owner)
+        OrderedDict.clear(self)
+        self.numbers.clear()
+        if self.owner is not None:
+            self.owner._invalidate()
+
+    def copy(self, owner=None):
+        '''
+        A store of copies of the fields (see `Field.copy`), for *owner*.
+        '''
+        store = FieldStore(owner)
+        for name, field in self.iteritems():
+            field = field.copy()
+            field._parent = owner
+            OrderedDict.__setitem__(store, name, field)
+        store.numbers.update(self.numbers)
+        return store
+
+    def _changed(self, name, old, new):
+        # a group's str is only its count, and some fields aren't
+        # formatted with the others, so those are counted again
+        owner = self.owner
+        if owner is None:
+            return
+        if owner._sum is None and owner._parts is None:
+            # nothing to update, e.g. while the owner is created
+            owner._formatted = None
+            owner._changed()
+        elif name in owner._reformat or isinstance(old, Group) or isinstance(new, Group):
+            owner._invalidate()
+        elif new is None:
+            owner._update(old, str(old), '')
+        else:
+            owner._update(new, '' if old is None else str(old), str(new), old)
+
+
+def _adopt(field, owner):
+    # *field* is now in *owner*, as well as wherever else it was
+    parent = field._parent
+    if owner is None or parent is owner:
+        return
+    if parent is None:
+        field._parent = owner
+    elif isinstance(parent, _Owners):
+        if not any(o is owner for o in parent.owners):
+            parent.owners.append(owner)
+    else:
+        field._parent = _Owners([parent, owner])
+
+
+def _disown(field, owner):
+    # *field* is no longer in *owner*
+    parent = field._parent
+    if isinstance(parent, _Owners):
+        owners = parent.owners = [o for o in parent.owners if o is not owner]
+        if len(owners) == 1:
+            field._parent = owners[0]
+    elif parent is owner:
+        field._parent = None
+
+
+class _Owners(object):
+    '''
+    The messages, or groups, a field set in more than one of them is in,
+    each told whenever it changes.
+    '''
+
+    __slots__ = ('owners', )
+
+    def __init__(self, owners):
+        self.owners = owners
+
+    def _update(self, field, old, new, replaced=None):
+        for owner in self.owners:
+            owner._update(field, old, new, replaced)
+
+    def _detach(self):
+        for owner in self.owners:
+            owner._detach()
+
+    def _invalidate(self):
+        for owner in self.owners:
+            owner._invalidate()
+
+
+class _Shared(object):
+    '''
+    The fields of a header, trailer or message, shared with its copies
+    until one of them needs its own (see `FIXMessage.copy`). The fields
+    themselves belong to *owner*, the one they were shared by.
+    '''
+
+    __slots__ = ('fields', 'parts', 'order', 'owner', 'holders')
+
+    def __init__(self, fields, parts, order, owner):
+        self.fields = fields
+        self.parts = parts
+        self.order = order
+        self.owner = owner
+        self.holders = 1
+
+
 class FIXMixIn(object):
     '''
     A MixIn class for providing various getters and setters, along with
     container methods.
 
+    Tags are looked up by name in `_all`, and by number in `_numbers`,
+    both of which are built once per class. Initialized fields are kept
+    in a `FieldStore`, indexing them by number too.
+
+    The initialized fields are formatted once, and their length and sum
+    of bytes (for the BodyLength and CheckSum) kept up to date as fields
+    change, so a message only formats the fields that changed.
+
     '''
 
+    _numbers = {}
+
+    # fields formatted outside of _fields, setting them formats the
+    # fields again rather than updating the length and sum
+
+    _reformat = ()
+
+    _formatted = None
+    _length = None
+    _sum = None
+
+    # each field as it is formatted, the fields in the same order, and
+    # the position of each field (by id) once one changes
+
+    _parts = None
+    _order = None
+    _positions = None
+
+    # fields removed by reset, by name, for reuse
+
+    _spare = None
+
     def __contains__(self, item):
         '''
         Check if item is initialized in message. Item can be a tag,
@@ -293,7 +866,7 @@ class FIXMixIn(object):
             return item in self._initialized
 
         elif isinstance(item, (basestring, int)) and str(item).isdigit():
-            return any(f for f in self._initialized.itervalues() if f.number == str(item))
+            return str(item) in self._initialized.numbers
 
         elif isinstance(item, type) and issubclass(item, Field):
             return item.name in self._initialized
@@ -344,11 +917,7 @@ class FIXMixIn(object):
 
         if isinstance(tag, (basestring, int)) and str(tag).isdigit():
             tag = str(tag)
-            for field in self._initialized.itervalues():
-                if field.number == tag:
-                    break
-            else:
-                field = None
+            field = self._initialized.get(self._initialized.numbers.get(tag))
 
         elif isinstance(tag, basestring) and not str(tag).isdigit():
             field = self._initialized.get(tag)
@@ -371,11 +940,12 @@ class FIXMixIn(object):
             if isinstance(tag, type) and issubclass(tag, Field):
                 tag = tag.name
 
-            for field in self._all.itervalues():
-                if str(tag) in (field.name, field.number):
-                    break
-            else:
-                field = None
+            field = self._all.get(str(tag)) or self._numbers.get(str(tag))
+
+        if field and self._spare and len(args) == 1 and not kwargs and \
+                not issubclass(field, Group):
+            field = self._initialized[field.name] = self._field(field.name, field, args[0])
+            return field
 
         if field:
             field = self._initialized[field.name] = field(*args, **kwargs)
@@ -400,10 +970,7 @@ class FIXMixIn(object):
         :returns: A `phixlib.Field` or None
         '''
         if isinstance(tag, (basestring, int)) and str(tag).isdigit():
-            tag = str(tag)
-            for field in self._initialized.itervalues():
-                if field.number == tag:
-                    return field
+            return self._initialized.get(self._initialized.numbers.get(str(tag)))
 
         elif isinstance(tag, basestring) and not str(tag).isdigit():
             return self._initialized.get(tag)
@@ -417,6 +984,157 @@ class FIXMixIn(object):
         else:
             return
 
+    def _fields(self):
+        return _flatten(*self._initialized.itervalues())
+
+    def _field(self, name, tag, value):
+        # a field of type *tag*, one removed by reset if there is one
+        if self._spare:
+            field = self._spare.pop(name, None)
+            if field is not None:
+                field._value = value
+                return field
+        return tag(value)
+
+    def _clear(self):
+        # remove every field, keeping them for reuse
+        spare = self.__dict__.get('_spare')
+        if spare is None:
+            spare = self._spare = {}
+        for name, field in self._initialized.iteritems():
+            # fields also in another message keep their values
+            if not isinstance(field, Group) and field._parent is self:
+                spare[name] = field
+        self._initialized.clear()
+
+    def _refill(self, kwargs, names):
+        # if *names* are the fields this has, none of them a group, give
+        # them their values from kwargs where they are
+        store = self._initialized
+        if len(store) != len(names):
+            return False
+        for name in names:
+            field = store.get(name)
+            if field is None or isinstance(field, Group):
+                return False
+            if field._value != kwargs[name]:
+                field.value = kwargs[name]
+        return True
+
+    def _format(self):
+        # the initialized fields, as they're formatted in the message
+        if self._formatted is None:
+            if self._parts is None:
+                self._order = list(self._fields())
+                self._parts = map(str, self._order)
+                self._positions = None
+            self._formatted = ''.join(self._parts)
+            if self._sum is None:
+                self._length = len(self._formatted)
+                self._sum = sum(bytearray(self._formatted))
+        return self._formatted
+
+    def _count(self):
+        # the length and sum of bytes of the formatted fields
+        if self._sum is None:
+            self._format()
+        return self._length, self._sum
+
+    def _update(self, field, old, new, replaced=None):
+        # *field* was formatted as *old*, and is now formatted as *new*;
+        # it was added if *old* is empty, removed if *new* is, and may
+        # have replaced another field
+        if field.name in self._reformat:
+            # not one of the fields counted, see _reformat
+            self._invalidate()
+            return
+
+        if self._sum is not None:
+            self._length += len(new) - len(old)
+            self._sum += sum(bytearray(new)) - sum(bytearray(old))
+
+        if self._parts is not None:
+            if self._positions is None:
+                self._positions = dict(izip(imap(id, self._order), count()))
+            position = self._positions.pop(id(replaced or field), None)
+
+            if position is not None and new:
+                self._parts[position] = new
+                self._order[position] = field
+                self._positions[id(field)] = position
+            elif not old:
+                # fields are added after the others
+                self._positions[id(field)] = len(self._parts)
+                self._parts.append(new)
+                self._order.append(field)
+            else:
+                self._parts = None
+
+        self._formatted = None
+        self._changed()
+
+    def _invalidate(self):
+        self._formatted = self._length = self._sum = self._parts = None
+        self._changed()
+
+    def _changed(self):
+        if self._message is not None:
+            self._message._encoded = None
+
+    # Copies
+
+    def __getattr__(self, name):
+        # a copy, or the original, gets fields of its own the first time
+        # it needs them
+        if name == '_initialized' and '_shared' in self.__dict__:
+            return self._unshare()
+        raise AttributeError(name)
+
+    def _copy(self, **attributes):
+        # a copy sharing this one's fields, and how they're formatted
+        shared = self.__dict__.get('_shared')
+        if shared is None:
+            shared = self._shared = _Shared(self.__dict__.pop('_initialized'),
+                                            self._parts, self._order, self)
+            self._parts = self._order = self._positions = None
+        shared.holders += 1
+
+        copy = object.__new__(type(self))
+        copy.__dict__.update(self.__dict__, mutations=dict(self.mutations))
+        copy.__dict__.update(attributes)
+        return copy
+
+    def _unshare(self):
+        # The fields' owner takes them, leaving copies for the others;
+        # the others copy them. Fields only copy their value, so the
+        # formatted parts of the fields are still good.
+        shared = self.__dict__.pop('_shared')
+        shared.holders -= 1
+
+        if shared.owner is self:
+            self._initialized = shared.fields
+            self._parts, self._order = shared.parts, shared.order
+            if shared.holders:
+                shared.fields = shared.fields.copy()
+                if shared.parts is not None:
+                    shared.parts = list(shared.parts)
+                shared.owner = None
+        else:
+            self._initialized = shared.fields.copy(self)
+            if shared.parts is None:
+                self._parts = self._order = None
+            else:
+                self._parts = list(shared.parts)
+                self._order = list(self._fields())
+
+        self._positions = None
+        return self._initialized
+
+    def _detach(self):
+        # about to change one of the fields, which mustn't be shared
+        if '_shared' in self.__dict__:
+            self._unshare()
+
 
 class FIXHeader(FIXMixIn):
     '''
@@ -428,82 +1146,65 @@ class FIXHeader(FIXMixIn):
 
     __metaclass__ = FIXMeta
 
+    _reformat = ('BeginString', 'BodyLength', 'MsgType')
+
     def __init__(self, message=None, *args, **kwargs):
-        self._initialized = OrderedDict()
         self._message = message
+        self._initialized = FieldStore(self)
+        self._populate(kwargs)
+        self.mutations = {}
 
+    def _populate(self, kwargs):
         # we loop over _all items in order because the spec says so
 
         for name, tag in self._all.iteritems():
             if name in kwargs:
-                value = kwargs[name]
-                field = tag(value)
-                self._initialized[name] = field
+                self._initialized[name] = self._field(name, tag, kwargs[name])
 
         # try to guess the msgtype from the message
 
-        if 'MsgType' not in kwargs and message is not None:
-            self._initialized['MsgType'] = self.MsgType(message.msgtype)
+        if 'MsgType' not in kwargs and self._message is not None:
+            self._initialized['MsgType'] = self._field(
+                'MsgType', self.MsgType, self._message.msgtype)
 
-        self.mutations = {}
+    def _refill(self, kwargs, names):
+        if 'MsgType' not in kwargs and self._message is not None:
+            kwargs = dict(kwargs, MsgType=self._message.msgtype)
+            names = names + ['MsgType']
+        return super(FIXHeader, self)._refill(kwargs, names)
 
     def __iter__(self):
         for field in _flatten(*self._initialized.itervalues()):
             yield field
 
     def __repr__(self):
-        m = []
-
-        # BeginString is ALWAYS FIRST FIELD IN MESSAGE (always unencrypted)
-
-        m.append(repr(self._initialized.get('BeginString',
-            self.BeginString(self.version))))
-
-        # BodyLength is ALWAYS SECOND FIELD IN MESSAGE (always unencrypted)
-
-        length = len(self._message)
-        m.append(repr(self.BodyLength(length)))
-
-        # MsgType is ALWAYS THIRD FIELD IN MESSAGE (always unencrypted)
-
-        m.append(repr(self._initialized.get('MsgType',
-            self.MsgType(self._message.msgtype))))
-
-        for name, field in self._initialized.iteritems():
-            # BeginString and BodyLength are added later, MsgType
-            # already added (and included in BodyLength calculation
-            if name in ('BeginString', 'BodyLength', 'MsgType'):
-                continue
-            m.append(repr(field))
-
-        return ''.join(m)
+        m = [self._begin_string(), self.BodyLength(len(self._message))]
+        m.extend(self._fields())
+        return ''.join(imap(repr, m))
 
     def __str__(self):
-        m = []
+        m = [self._begin_string(), self.BodyLength(len(self._message))]
+        m.extend(self._fields())
+        return ''.join(imap(str, m))
 
+    def _begin_string(self):
         # BeginString is ALWAYS FIRST FIELD IN MESSAGE (always unencrypted)
-
-        m.append(str(self._initialized.get('BeginString',
-            self.BeginString(self.version))))
-
         # BodyLength is ALWAYS SECOND FIELD IN MESSAGE (always unencrypted)
 
-        length = len(self._message)
-        m.append(str(self.BodyLength(length)))
+        return self._initialized.get('BeginString', self.BeginString(self.version))
 
-        # MsgType is ALWAYS THIRD FIELD IN MESSAGE (always unencrypted)
+    def _fields(self):
+        # MsgType is ALWAYS THIRD FIELD IN MESSAGE (always unencrypted),
+        # these are the fields BodyLength counts
 
-        m.append(str(self._initialized.get('MsgType',
-            self.MsgType(self._message.msgtype))))
+        yield self._initialized.get('MsgType', self.MsgType(self._message.msgtype))
 
         for name, field in self._initialized.iteritems():
-            # BeginString and BodyLength are added later, MsgType
+            # BeginString and BodyLength are added separately, MsgType
             # already added (and included in BodyLength calculation
-            if name in ('BeginString', 'BodyLength', 'MsgType'):
+            if name in self._reformat:
                 continue
-            m.append(str(field))
-
-        return ''.join(m)
+            yield field
 
     def initialize(self, optional=False, **kwargs):
         '''
@@ -546,19 +1247,20 @@ class FIXTrailer(FIXMixIn):
 
     __metaclass__ = FIXMeta
 
+    _reformat = ('CheckSum', )
+
     def __init__(self, message=None, *args, **kwargs):
-        self._initialized = OrderedDict()
         self._message = message
+        self._initialized = FieldStore(self)
+        self._populate(kwargs)
+        self.mutations = {}
 
+    def _populate(self, kwargs):
         # we loop over _all items in order because the spec says so
 
         for name, tag in self._all.iteritems():
             if name in kwargs:
-                value = kwargs[name]
-                field = tag(value)
-                self._initialized[name] = field
-
-        self.mutations = {}
+                self._initialized[name] = self._field(name, tag, kwargs[name])
 
     def __iter__(self):
         for field in _flatten(*self._initialized.itervalues()):
@@ -572,6 +1274,9 @@ class FIXTrailer(FIXMixIn):
     def __str__(self):
         return ''.join(imap(str, self))
 
+    def _fields(self):
+        return iter(self)
+
     def initialize(self, optional=False, **kwargs):
         '''
         Initializes a FIXTrailer, with optionally supplied kwargs.
@@ -607,11 +1312,28 @@ class FIXMessage(FIXMixIn):
 
     __metaclass__ = FIXMeta
 
+    # the formatted message and its CheckSum, until a field of the
+    # message, or its header or trailer, changes (see FIXMixIn)
+
+    _encoded = None
+    _checksum = None
+
+    # the most released messages of a type kept for reuse (see release)
+
+    pool_size = 64
+
+    # phixlib.view.FIXMessageView, once a message is first viewed
+
+    _view_type = None
+
     def __init__(self, *args, **kwargs):
         self.header = self.Header(self, *args, **kwargs)
         self.trailer = self.Trailer(self, *args, **kwargs)
-        self._initialized = OrderedDict()
+        self._initialized = FieldStore(self)
+        self._populate(kwargs)
+        self.mutations = {}
 
+    def _populate(self, kwargs):
         # we loop over _all items in order because the spec says so
 
         for name, tag in self._all.iteritems():
@@ -627,11 +1349,66 @@ class FIXMessage(FIXMixIn):
                 self._initialized[name] = field
 
             elif name in kwargs:
-                value = kwargs[name]
-                field = tag(value)
-                self._initialized[name] = field
+                self._initialized[name] = self._field(name, tag, kwargs[name])
 
-        self.mutations = {}
+    def reset(self, **kwargs):
+        '''
+        Removes every field from the message, its header and trailer,
+        then sets *kwargs*, as creating the message with them would.
+        The fields removed are reused, by this and `set`, when fields of
+        the same names are set again.
+
+        If the header, body or trailer has just the fields *kwargs* sets
+        (as when resetting a message with the same fields over and over),
+        their values are set where they are instead.
+
+        :returns: This message.
+        '''
+        parts = (self.header, self, self.trailer)
+        names = [[name for name in kwargs if name in part._all] for part in parts]
+
+        # anything else, e.g. fields of repeating groups, is up to _populate
+
+        refill = sum(imap(len, names)) == len(kwargs)
+
+        for part, names in izip(parts, names):
+            if part.mutations:
+                part.mutations = {}
+            if not (refill and part._refill(kwargs, names)):
+                part._clear()
+                part._populate(kwargs)
+
+        return self
+
+    @classmethod
+    def acquire(cls, **kwargs):
+        '''
+        Returns a message of this type, created with *kwargs*, reusing
+        one that was released if there is one (see `reset`).
+
+        >>> for i in xrange(1000000):
+        ...     order = FIX.FIX42.NewOrderSingle.acquire(ClOrdID=str(i), ...)
+        ...     sock.sendall(str(order))
+        ...     order.release()
+        '''
+        cls = cls._message_type(kwargs)
+        pool = cls.__dict__.get('_pool')
+        if pool:
+            return pool.pop().reset(**kwargs)
+        return cls(**kwargs)
+
+    def release(self):
+        '''
+        Returns this message to its type's pool, for `acquire` to reuse,
+        unless `pool_size` messages are already waiting to be. The
+        message mustn't be used once it's released.
+        '''
+        cls = type(self)
+        pool = cls.__dict__.get('_pool')
+        if pool is None:
+            pool = cls._pool = []
+        if len(pool) < cls.pool_size:
+            pool.append(self)
 
     def __iter__(self):
         '''
@@ -648,41 +1425,102 @@ class FIXMessage(FIXMixIn):
         '''
         Calculates the true BodyLength of the message.
         '''
-        length = 0
-        for field in self:
-            if field.name in ('BeginString', 'BodyLength', 'CheckSum'):
-                continue
-            length += len(str(field))
-        return length
+        return self.header._count()[0] + self._count()[0] + self.trailer._count()[0]
 
     def __repr__(self):
         '''
         Format this message in a human-readable form (SOH delimiters
         are represented as the pipe '|' character).
         '''
-        # We do this twice, once with str and once with repr. str is used
-        # to get the actual value of the CheckSum field, without inflating
-        # our ordinal sum with a pipe.
-        m = "{0}{1}{2}".format(self.header,
-            ''.join(imap(str, _flatten(*self._initialized.itervalues()))),
-            self.trailer)
+        # The CheckSum is that of the message as str formats it, without
+        # inflating our ordinal sum with pipes.
+        if self._encoded is None:
+            self._encode()
 
         r = "{0}{1}{2}".format(repr(self.header),
             ''.join(imap(repr, _flatten(*self._initialized.itervalues()))),
             repr(self.trailer))
 
-        r += repr(self.trailer.CheckSum('%03d' % (sum(bytearray(m)) % 256, )))
+        r += repr(self.trailer.CheckSum(self._checksum))
         return r
 
     def __str__(self):
         '''
         Format this message for consumption by a FIX engine.
+
+        The message is only formatted again after one of its fields, or
+        the fields of its header, trailer or repeating groups, is set,
+        added or removed, and then only the header, body or trailer
+        that changed.
         '''
-        m = "{0}{1}{2}".format(self.header,
-            ''.join(imap(str, _flatten(*self._initialized.itervalues()))),
-            self.trailer)
-        m += str(self.trailer.CheckSum('%03d' % (sum(bytearray(m)) % 256, )))
-        return m
+        if self._encoded is None:
+            self._encode()
+        return self._encoded
+
+    def encode_into(self, buffer, offset=0):
+        '''
+        Write this message, as str formats it, into *buffer* at
+        *offset*, rather than returning a new str.
+
+        :param buffer: A writable buffer with room for the message, e.g.
+            a bytearray, memoryview or mmap.
+        :returns: The offset just after the message.
+        '''
+        if self._encoded is None:
+            self._encode()
+
+        end = offset + len(self._encoded)
+        if offset < 0 or end > len(buffer):
+            raise ValueError('buffer of %d bytes is too small for %d bytes '
+                             'at offset %d' % (len(buffer), len(self._encoded), offset))
+
+        buffer[offset:end] = self._encoded
+        return end
+
+    @staticmethod
+    def encode_many(messages, buffer, offset=0):
+        '''
+        Write *messages* into *buffer*, one after the other, starting at
+        *offset* (see `encode_into`), so they can be sent at once.
+
+        >>> offsets = FIXMessage.encode_many(messages, buffer)
+        >>> sock.sendall(memoryview(buffer)[offsets[0]:offsets[-1]])
+
+        :returns: A list of offsets, where each message starts and the
+            last one ends: message i is at buffer[offsets[i]:offsets[i + 1]].
+        '''
+        size = len(buffer)
+        offsets = [offset]
+        append = offsets.append
+
+        for message in messages:
+            encoded = message._encoded or str(message)
+            end = offset + len(encoded)
+            if offset < 0 or end > size:
+                raise ValueError('buffer of %d bytes is too small for %d bytes '
+                                 'at offset %d' % (size, len(encoded), offset))
+            buffer[offset:end] = encoded
+            append(end)
+            offset = end
+
+        return offsets
+
+    def _encode(self):
+        # BodyLength counts the bytes from MsgType up to the CheckSum,
+        # the CheckSum adds the bytes before it to the sums kept by the
+        # header, body and trailer
+        header, trailer = self.header, self.trailer
+        body = header._format() + self._format() + trailer._format()
+
+        m = str(header._begin_string()) + str(header.BodyLength(len(body)))
+        checksum = sum(bytearray(m)) + header._sum + self._sum + trailer._sum
+        checksum = '%03d' % (checksum % 256, )
+
+        self._checksum = checksum
+        self._encoded = m + body + str(trailer.CheckSum(checksum))
+
+    def _changed(self):
+        self._encoded = None
 
     @classmethod
     def fromstring(cls, message, parse_message=None, **kwargs):
@@ -707,12 +1545,74 @@ class FIXMessage(FIXMixIn):
 
         if 'MsgType' in parts and cls is FIXMessage:
             version = parts.get('BeginString', cls.__module__[4:])
-            _registry = FIXMeta._registry[cls.__module__[4:]]
-            _registry = FIXMeta._registry.get(version, _registry)
+            _registry = FIXMeta._registry.get(version) or \
+                FIXMeta._registry[cls.__module__[4:]]
+            _registry = _dispatch(_registry, parts['MsgType'], parts.get('ApplVerID'))
             cls = _registry.Messages.get(parts['MsgType'], cls)
 
         return cls(**parts)
 
+    @classmethod
+    def view(cls, message, **kwargs):
+        '''
+        Returns a lazy `phixlib.view.FIXMessageView` of *message*, which
+        only creates the fields that are accessed. Unless it is called
+        on a version's FIXMessage, the message is viewed as *cls*.
+
+        >>> view = FIX.FIXMessage.view('8=FIX.4.2|9=..|35=D|...')
+        >>> view.get('ClOrdID')
+        11=C1111|
+
+        :param message: A raw FIX message, as a str, or any object
+            supporting the buffer protocol.
+        '''
+        view_type = FIXMessage._view_type
+        if view_type is None:
+            from .view import FIXMessageView as view_type
+            FIXMessage._view_type = view_type
+
+        if cls.__name__ == 'FIXMessage':
+            kwargs.setdefault('version', cls.__module__[4:])
+        else:
+            kwargs.setdefault('cls', cls)
+
+        return view_type(message, **kwargs)
+
+    def copy(self):
+        '''
+        Returns a copy of this message, which shares the fields of the
+        message, its header and trailer, and how they're formatted, with
+        this one. The header, body or trailer of either is copied the
+        first time its fields are accessed, or changed.
+
+        >>> resend = order.copy()
+        >>> resend.header.set('PossDupFlag', 'Y')
+        43=Y|
+
+        :returns: A `FIXMessage` of the same type.
+        '''
+        copy = self._copy()
+        copy.header = self.header._copy(_message=copy)
+        copy.trailer = self.trailer._copy(_message=copy)
+        return copy
+
+    @classmethod
+    def template(cls, *variables, **fields):
+        '''
+        Returns a `phixlib.template.FIXTemplate` of this message, with
+        *fields* formatted once, and *variables* given a value every
+        time it's formatted.
+
+        >>> order = FIX.FIX42.NewOrderSingle.template('ClOrdID', Symbol='IBM')
+        >>> order.format(ClOrdID='C1')
+        '8=FIX.4.2\\x019=18\\x0135=D\\x0111=C1\\x0155=IBM\\x0110=125\\x01'
+
+        :param variables: Names of the fields that change between messages.
+        '''
+        from .template import FIXTemplate
+
+        return FIXTemplate(cls, variables, **fields)
+
     def initialize(self, optional=False, **kwargs):
         '''
         Initializes a FIXMessage, with optionally supplied kwargs.
@@ -761,6 +1661,13 @@ class Field(object):
 
     __metaclass__ = FIXMeta
 
+    # Messages are made of dozens of fields, and applications keep a
+    # lot of messages around, so keep fields small: no __dict__ unless
+    # an attribute other than these is set on one, and no mutations
+    # until they're asked for.
+
+    __slots__ = ('_value', '_mutations', '_group', '_parent', '_typed', '__dict__')
+
     def __init__(self, value=None, *args, **kwargs):
         if value is None:
             default = kwargs.get('default', True)
@@ -770,9 +1677,8 @@ class Field(object):
             elif bool(default):
                 value = self.generate_value(**kwargs)
 
-        self.value = value
-        self.mutations = {}
-        self._group = kwargs.get('_group')
+        self._value = value
+        self._parent = self._group = kwargs.get('_group')
 
     def __repr__(self):
         '''
@@ -806,6 +1712,88 @@ class Field(object):
     def group(self):
         return self._group
 
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        # the message this field is in must be formatted again
+        if self._parent is None:
+            self._value = value
+            return
+        self._parent._detach()
+        old = str(self)
+        self._value = value
+        self._parent._update(self, old, str(self))
+
+    # phixlib.parser's decode_value, once a typed value is read
+
+    _decode_value = None
+
+    @property
+    def typed(self):
+        '''
+        The value converted to the Python type its spec type names, e.g.
+        an int for a SEQNUM or a datetime for a UTCTIMESTAMP (see
+        `phixlib.parser.decode_value`). The value is converted as it's
+        read, so fields that aren't read are never converted, and kept
+        until the value changes.
+        '''
+        # the value it was converted from, and what it was converted to
+        value = self._value
+        try:
+            raw, typed = self._typed
+            if raw is value:
+                return typed
+        except AttributeError:
+            pass
+
+        decode_value = Field._decode_value
+        if decode_value is None:
+            from .parser import decode_value
+            Field._decode_value = staticmethod(decode_value)
+        typed = decode_value(self.type, value)
+        self._typed = (value, typed)
+        return typed
+
+    @property
+    def mutations(self):
+        try:
+            return self._mutations
+        except AttributeError:
+            self._mutations = {}
+            return self._mutations
+
+    @mutations.setter
+    def mutations(self, mutations):
+        self._mutations = mutations
+
+    def copy(self):
+        '''
+        A copy of this field, with the same value, that isn't in a
+        message or group.
+        '''
+        copy = object.__new__(type(self))
+        copy._value = self._value
+        copy._group = copy._parent = None
+        mutations = getattr(self, '_mutations', None)
+        if mutations is not None:
+            copy._mutations = dict(mutations)
+        return copy
+
+    def _update(self, field, old, new, replaced=None):
+        if self._parent is not None:
+            self._parent._update(field, old, new, replaced)
+
+    def _detach(self):
+        if self._parent is not None:
+            self._parent._detach()
+
+    def _invalidate(self):
+        if self._parent is not None:
+            self._parent._invalidate()
+
 
 class Group(object):
     '''
@@ -819,6 +1807,8 @@ class Group(object):
 
     __metaclass__ = FIXMeta
 
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         '''
         To initialize a repeating group, supply a list of dict.
@@ -854,9 +1844,10 @@ class Group(object):
                     # Call .get() here, as the group tag may not have
                     # been explicitly passed as a keyword arg. If it is
                     # specified though, we'll set the value in the kwarg
-                    # as that group tag's value.
+                    # as that group tag's value. kwargs names the group
+                    # this one is nested in, if any, as its _group.
 
-                    field = tag(*kw.get(name, []), _group=self, **kwargs)
+                    field = tag(*kw.get(name, []), **dict(kwargs, _group=self))
 
                 elif name in kw:
                     value = kw[name]
@@ -879,8 +1870,7 @@ class Group(object):
             else:
                 self._initialized.append(group)
 
-        self.mutations = {}
-        self._group = kwargs.get('_group')
+        self._parent = self._group = kwargs.get('_group')
 
     def __repr__(self):
         '''
@@ -907,10 +1897,16 @@ class Group(object):
         return self._initialized[key]
 
     def __setitem__(self, key, value):
+        self._detach()
         self._initialized[key] = value
+        for field in (value if isinstance(key, (int, long)) else _flatten(*value)):
+            _adopt(field, self)
+        self._invalidate()
 
     def __delitem__(self, key):
+        self._detach()
         del self._initialized[key]
+        self._invalidate()
 
     def __len__(self):
         return len(self._initialized)
@@ -928,6 +1924,35 @@ class Group(object):
     def value(self):
         return len(self._initialized)
 
+    def reset(self, *args, **kwargs):
+        '''
+        Replaces the repeating group's instances with *args*, a list of
+        dict as when creating the group, or none, keeping the group in
+        the message or group it is in.
+        '''
+        self._detach()
+        parent, group = self._parent, self._group
+        kwargs.setdefault('default', False)
+        Group.__init__(self, *args, **kwargs)
+        self._parent, self._group = parent, group
+        self._invalidate()
+        return self
+
+    def copy(self):
+        '''
+        A copy of this group, and every field in it, that isn't in a
+        message or group.
+        '''
+        copy = object.__new__(type(self))
+        copy._group = copy._parent = None
+        copy._initialized = []
+        for fields in self._initialized:
+            fields = [field.copy() for field in fields]
+            for field in fields:
+                field._group = field._parent = copy
+            copy._initialized.append(fields)
+        return copy
+
     def initialize(self, optional=False, **kwargs):
         '''
         Initializes a Group, with optionally supplied kwargs.
@@ -959,6 +1984,16 @@ class Group(object):
         return
 
 
+def _flatten_types(cls):
+    # every field type of a message, header, trailer or group type,
+    # including the members of its repeating groups
+    for field in cls._all.itervalues():
+        yield field
+        if issubclass(field, Group):
+            for member in _flatten_types(field):
+                yield member
+
+
 def _flatten(*args):
     for arg in args:
         if hasattr(arg, '__iter__'):
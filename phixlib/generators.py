@@ -9,25 +9,55 @@ in this module automatically are attached as a classmethod to a Field.
 
 '''
 from functools import wraps
-from pkg_resources import resource_string
+from pkgutil import get_data
 from random import SystemRandom
 import datetime
-import json
 import os
 import string
+import sys
+import types
 
 
 random = SystemRandom()
 
-ISO_CODES = json.loads(resource_string(__name__, 'spec/isocodes.json'))
 GENERATORS = {}
 
 
-try:
-    with open('/usr/share/dict/words', 'rb') as wordlist:
-        WORDLIST = wordlist.read().strip().splitlines()
-except IOError:
-    WORDLIST = None
+def load_once(f):
+    '''
+    Call *f* the first time its data is needed rather than on import,
+    and keep the result around for every call after that.
+    '''
+    cache = []
+
+    @wraps(f)
+    def wrapper():
+        if not cache:
+            cache.append(f())
+        return cache[0]
+
+    return wrapper
+
+
+@load_once
+def iso_codes():
+    '''
+    ISO country, currency, exchange, and language codes.
+    '''
+    import json
+    return json.loads(get_data(__name__, 'spec/isocodes.json'))
+
+
+@load_once
+def wordlist():
+    '''
+    The system's dictionary words, or None if there aren't any.
+    '''
+    try:
+        with open('/usr/share/dict/words', 'rb') as words:
+            return words.read().strip().splitlines()
+    except IOError:
+        return None
 
 
 def use_defaults(f):
@@ -79,12 +109,12 @@ def generate_CHAR(tag, **kwargs):
 
 @use_defaults
 def generate_COUNTRY(tag, **kwargs):
-    return random.choice(ISO_CODES['countries'])
+    return random.choice(iso_codes()['countries'])
 
 
 @use_defaults
 def generate_CURRENCY(tag, **kwargs):
-    return random.choice(ISO_CODES['currencies'])
+    return random.choice(iso_codes()['currencies'])
 
 
 @use_defaults
@@ -99,7 +129,7 @@ def generate_DAYOFMONTH(tag, **kwargs):
 
 @use_defaults
 def generate_EXCHANGE(tag, **kwargs):
-    return random.choice(ISO_CODES['exchanges'])
+    return random.choice(iso_codes()['exchanges'])
 
 
 @use_defaults
@@ -116,7 +146,7 @@ def generate_INT(tag, **kwargs):
 
 @use_defaults
 def generate_LANGUAGE(tag, **kwargs):
-    return random.choice(ISO_CODES['languages'])
+    return random.choice(iso_codes()['languages'])
 
 
 @use_defaults
@@ -180,7 +210,7 @@ def generate_SEQNUM(tag, **kwargs):
 @use_defaults
 def generate_STRING(tag, **kwargs):
     try:
-        return random.choice(WORDLIST)
+        return random.choice(wordlist())
     except TypeError:
         alnums = string.letters + string.digits
         s = ''.join([random.choice(alnums) for x in
@@ -273,3 +303,31 @@ GENERATORS = {
 GENERATORS['BeginString'] = generate_BeginString
 GENERATORS['Symbol'] = generate_Symbol
 GENERATORS['TotQuoteEntries'] = generate_TotQuoteEntries
+
+
+class _Module(types.ModuleType):
+    '''
+    This module, with `ISO_CODES` and `WORDLIST` for code that imports
+    them, loaded when they're first used (see `iso_codes` and
+    `wordlist`) rather than on import.
+
+    Attributes set on it are set on the module its functions use too.
+    '''
+
+    ISO_CODES = property(lambda self: iso_codes())
+    WORDLIST = property(lambda self: wordlist())
+
+    def __init__(self, module):
+        types.ModuleType.__init__(self, module.__name__, module.__doc__)
+        self.__dict__.update(vars(module), _module=module)
+
+    def __setattr__(self, name, value):
+        types.ModuleType.__setattr__(self, name, value)
+        setattr(self._module, name, value)
+
+    def __delattr__(self, name):
+        types.ModuleType.__delattr__(self, name)
+        delattr(self._module, name)
+
+
+sys.modules[__name__] = _Module(sys.modules[__name__])
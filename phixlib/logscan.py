@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+'''
+phixlib.logscan
+~~~~~~~~~~~~~~~
+
+This module scans FIX logs, files of many messages one after the other,
+e.g. a day's session log, across a pool of processes.
+
+    >>> for parts in scan_log('session.log'):
+    ...     print parts['MsgType']
+    D
+    8
+    >>> reduce_log('session.log', count_msg_types, operator.add, Counter())
+    Counter({'8': 1202911, 'D': 601456, '0': 8640})
+
+The log is memory-mapped and split into chunks at message boundaries
+(see `split_log`). Each chunk is parsed by a process of its own with
+`phixlib.parser.parse_many`; anything between messages, e.g. a
+timestamp at the start of each line, is skipped.
+
+Functions given to `scan_log` and `reduce_log` are called by other
+processes, and must be picklable (defined at the top level of a
+module), as must what they return.
+
+'''
+import copy
+import gc
+import itertools
+import mmap
+import multiprocessing
+import os
+
+from .parser import frame_message, parse_many
+
+
+__all__ = ['split_log', 'scan_log', 'reduce_log']
+
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+BATCH_SIZE = 64 * 1024
+
+
+def split_log(path, chunk_size=CHUNK_SIZE, delimiter=b'\x01'):
+    '''
+    Split the log at *path* into chunks of about *chunk_size* bytes,
+    each beginning with a message (see `phixlib.parser.frame_message`),
+    so no message is split across chunks.
+
+    :returns: A list of ``(start, end)`` offsets of each chunk.
+    '''
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return []
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        bounds = [0]
+        while True:
+            begin = _next_message(mm, bounds[-1] + chunk_size, size, delimiter)
+            if begin >= size:
+                break
+            bounds.append(begin)
+    finally:
+        mm.close()
+
+    bounds.append(size)
+    return zip(bounds, bounds[1:])
+
+
+def scan_log(path, function=None, processes=None, chunk_size=CHUNK_SIZE, **options):
+    '''
+    Parse every message in the log at *path*.
+
+    :param function: Called with what each message is parsed to, in the
+        process that parsed it, e.g. to pick out the fields of interest
+        rather than send every message back. By default, what each
+        message is parsed to is returned as it is.
+
+    :param processes: The number of processes to parse the log with, by
+        default one per CPU. With 1, the log is parsed in this process.
+
+    :param chunk_size: The size of each chunk of the log (see
+        `split_log`), parsed by a process at a time.
+
+    :param options: Passed on to `phixlib.parser.parse_many`, e.g.
+        *delimiter*, *version* or *results*. Views and messages can't be
+        sent from one process to another, so with *results* other than
+        ``'dict'``, either *function* or ``processes=1`` must be given.
+
+    :returns: An iterator of what each message was parsed to (or of
+        *function* of it), in the order they are in the log.
+    '''
+    if function is None and processes != 1 and options.get('results', 'dict') != 'dict':
+        raise ValueError('views and messages can only be scanned by a function, '
+                         'or with processes=1')
+
+    tasks = [(path, start, end, function, options)
+             for start, end in split_log(path, chunk_size, options.get('delimiter', b'\x01'))]
+
+    return itertools.chain.from_iterable(_map(_scan, tasks, processes))
+
+
+def reduce_log(path, function, combine, initial, processes=None, chunk_size=CHUNK_SIZE,
+               **options):
+    '''
+    Aggregate every message in the log at *path*.
+
+    Each chunk of the log (see `split_log`) is reduced to a value of its
+    own, by a process of its own, starting from a copy of *initial*::
+
+        value = function(value, message)
+
+    for each message in it, in order. The values of the chunks are then
+    combined, in order, in this process::
+
+        value = combine(value, chunk_value)
+
+    :param initial: Where reducing each chunk starts from, returned as
+        it is if there are no chunks.
+
+    See `scan_log` for *processes*, *chunk_size* and *options*.
+    '''
+    tasks = [(path, start, end, function, initial, options)
+             for start, end in split_log(path, chunk_size, options.get('delimiter', b'\x01'))]
+
+    if not tasks:
+        return initial
+
+    return reduce(combine, _map(_reduce, tasks, processes))
+
+
+def _next_message(data, pos, size, delimiter):
+    # where the first message in data (a log, or a chunk of it) from pos
+    # on begins, or size if none
+    window = 4096
+
+    while pos < size:
+        begin, end = frame_message(data[pos:pos + window], 0, delimiter)
+        if end >= 0 or pos + window >= size:
+            return pos + begin
+
+        if begin:
+            # skip what can't be the start of a message
+            pos += begin
+        else:
+            # the message is longer than the window
+            window *= 2
+
+    return size
+
+
+def _map(func, tasks, processes):
+    # func of each task, in order, by a pool of processes
+    if processes == 1:
+        for result in itertools.imap(func, tasks):
+            yield result
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap(func, tasks):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _read(path, start, end):
+    # a chunk of the log
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return mm[start:end]
+    finally:
+        mm.close()
+
+
+def _scan(task):
+    path, start, end, function, options = task
+    chunk = _read(path, start, end)
+
+    # the thousands of dicts parsed can't be in a cycle, but would have
+    # the collector walk them over and over as they're parsed
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        parsed = parse_many(chunk, **options)
+    finally:
+        if enabled:
+            gc.enable()
+
+    if function is not None:
+        parsed = map(function, parsed)
+    return parsed
+
+
+def _reduce(task):
+    path, start, end, function, initial, options = task
+    chunk = _read(path, start, end)
+    size = len(chunk)
+    delimiter = options.get('delimiter', b'\x01')
+
+    # a copy, as a process of the pool would be given
+    value = copy.deepcopy(initial)
+
+    # parse a batch of messages at a time, rather than all of the chunk,
+    # as only the value is kept
+
+    pos = 0
+    while pos < size:
+        batch = _next_message(chunk, pos + BATCH_SIZE, size, delimiter)
+        value = reduce(function, parse_many(memoryview(chunk)[pos:batch], **options), value)
+        pos = batch
+
+    return value
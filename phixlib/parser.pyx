@@ -11,17 +11,64 @@ on the BeginString, falling back to the FIX version supplied in
 *version* (default is FIX.4.2).
 
 If you know the message type before hand, you can specify a *cls*
-parameter to `parse_message` to force parsing as that message.
+parameter to `parse_message` to force parsing as that message. If you
+only need a few of its fields, specify their *tags*, and only those
+are parsed. With *typed*, values are converted to the Python types
+their fields' spec types name (see `decode_value`).
+
+`scan_message` only finds where each field of a message is, without
+copying anything out of it (see `phixlib.view`).
+
+`frame_message` finds where a message begins and ends in a stream of
+messages (see `phixlib.stream`).
 
 '''
+from cpython cimport array
+from cpython.bytes cimport PyBytes_FromStringAndSize
+from cpython.datetime cimport import_datetime, date_new, datetime_new, time_new
+from array import array
+from decimal import Decimal
+
 from . import FIX
-from .fix import Field, Group
+from .fix import Field, Group, _dispatch
+
+
+__all__ = ['parse_message', 'parse_many', 'decode_value', 'scan_message', 'find_tag',
+           'frame_message']
+
+
+import_datetime()
 
 
-__all__ = ['parse_message']
+# what a value of each spec type is decoded to (see decode_value), and
+# the kinds of tag in _kinds tables
 
+cdef enum:
+    UNKNOWN = 0     # not a field of the registry
+    RAW             # str, as it is
+    LENGTH          # int, the length of the next field's value
+    INT
+    FLOAT
+    DECIMAL         # decimal.Decimal, exactly as it's written
+    BOOLEAN
+    TIMESTAMP       # datetime
+    DATE
+    TIME
 
-def parse_message(message, cls=None, version='FIX.4.2'):
+
+cdef dict _type_kinds = {
+    'INT': INT, 'SEQNUM': INT, 'NUMINGROUP': INT, 'DAYOFMONTH': INT, 'LENGTH': INT,
+    'FLOAT': FLOAT, 'QTY': FLOAT, 'PERCENTAGE': FLOAT,
+    'PRICE': DECIMAL, 'PRICEOFFSET': DECIMAL, 'AMT': DECIMAL,
+    'BOOLEAN': BOOLEAN,
+    'UTCTIMESTAMP': TIMESTAMP, 'TIME': TIMESTAMP,
+    'UTCDATEONLY': DATE, 'UTCDATE': DATE, 'LOCALMKTDATE': DATE, 'DATE': DATE,
+    'UTCTIMEONLY': TIME,
+}
+
+
+def parse_message(message, cls=None, version='FIX.4.2', appl_ver_id=None, tags=None,
+                  typed=False):
     '''
     Parse a FIX message as a string into dict of field names and values.
 
@@ -33,9 +80,10 @@ def parse_message(message, cls=None, version='FIX.4.2'):
     serialize the object to json or pickle it before discarding so you
     may recover it.
 
-    :param message: The FIX string you want to parse. Note, the last
-        byte of the message must be the field delimiter in order for
-        the message to be parsed correctly.
+    :param message: The FIX string you want to parse (unicode is
+        encoded as UTF-8), or any other object supporting the buffer
+        protocol (bytearray, memoryview, mmap). Note, the last byte of the message must be the field
+        delimiter in order for the message to be parsed correctly.
 
     :param cls: A FIX.FIXMessage class to parse this message as. If
         `None`, the parser will attempt to determine based on the
@@ -45,190 +93,1052 @@ def parse_message(message, cls=None, version='FIX.4.2'):
     :param version: FIX version to fallback to if it cannot be parsed
         from the BeginString, or the version is not registered in the
         FIX Registry.
+
+    :param appl_ver_id: For transports combined with application
+        versions (see `FIXRegistry.register_session`), the ApplVerID
+        of application messages without one, e.g. the DefaultApplVerID
+        negotiated at Logon. By default, the session's default
+        application is used.
+
+    :param tags: The tag numbers of the only fields to parse, e.g.
+        ``(35, 11, 39)``. Other fields are skipped over, and parsing
+        stops once each of these is found. Repeating groups aren't
+        structured: a tag in a group is its first occurrence, and
+        *cls* isn't used.
+
+    :param typed: If True, values are converted as by `decode_value`,
+        to an int, float, Decimal, bool, datetime, date or time, by the
+        spec type of their field, e.g. ``{'MsgSeqNum': 2, 'Price':
+        Decimal('101.25')}``. Values of other types, unknown tags, and
+        values that aren't valid for their type are left as they are.
+    '''
+    cdef const unsigned char[:] view
+    cdef const char *buf
+    cdef Py_ssize_t mlen
+
+    # scan the message's bytes in place; only the values (and tags
+    # unknown to the registry) are copied out of it
+
+    if isinstance(message, unicode):
+        message = message.encode('utf-8')
+
+    if type(message) is bytes:
+        buf = message
+        mlen = len(message)
+    else:
+        view = message
+        mlen = view.shape[0]
+        buf = <const char *>&view[0] if mlen else NULL
+
+    if mlen == 0:
+        raise IndexError('empty message')
+
+    if tags is not None:
+        return _project(buf, mlen, _projection(tags), version, appl_ver_id, typed)
+
+    return _parse(buf, mlen, cls, version, appl_ver_id, typed)[0]
+
+
+def parse_many(message, cls=None, version='FIX.4.2', appl_ver_id=None,
+               delimiter=b'\x01', results='dict', tags=None, typed=False):
     '''
+    Parse every message in *message*, a str or any other object
+    supporting the buffer protocol holding many messages one after the
+    other, e.g. captured traffic. Messages are framed as by
+    `frame_message`, and anything between them is skipped.
+
+    :param results: What each message is parsed to, ``'dict'`` for a
+        dict of field names and values (as `parse_message` returns),
+        ``'view'`` for a lazy `phixlib.view.FIXMessageView`, or
+        ``'message'`` for a `FIXMessage`.
+
+    See `parse_message` for *cls*, *version*, *appl_ver_id*, and *tags*
+    and *typed*, which only apply to dict results.
+
+    :returns: A list of what each message was parsed to, in order.
+    '''
+    cdef const unsigned char[:] view
+    cdef const unsigned char *buf
+    cdef Py_ssize_t n, begin = 0, end
+    cdef unsigned char soh
+    cdef list parsed = []
+    cdef tuple result, projection = None
+
+    if results not in ('dict', 'view', 'message'):
+        raise ValueError('results must be dict, view or message')
+
+    if (tags is not None or typed) and results != 'dict':
+        raise ValueError('tags and typed only apply to dict results')
+    if tags is not None:
+        projection = _projection(tags)
 
-    start = idx = 0
-    parts = {}
+    if len(delimiter) != 1:
+        raise ValueError('delimiter must be a single byte')
+    soh = ord(delimiter)
 
-    soh = message[-1]   # could be \001, |, ^...
+    view = message
+    n = view.shape[0]
+    buf = &view[0] if n else NULL
 
-    mlen = len(message)
-    find = message.find   # optimize attribute lookup
+    if results == 'view':
+        from .view import FIXMessageView
+
+    while True:
+        end = _frame(buf, n, &begin, soh)
+        if end < 0:
+            break
+
+        if projection is not None:
+            parsed.append(_project(<const char *>buf + begin, end - begin, projection,
+                                   version, appl_ver_id, typed))
+        elif results == 'view':
+            # each view keeps its own copy of its message
+            parsed.append(FIXMessageView(
+                PyBytes_FromStringAndSize(<const char *>buf + begin, end - begin),
+                cls=cls, version=version, appl_ver_id=appl_ver_id))
+        else:
+            result = _parse(<const char *>buf + begin, end - begin, cls, version, appl_ver_id,
+                            typed)
+            if results == 'dict':
+                parsed.append(result[0])
+            else:
+                # the class the message was parsed as, rather than
+                # looking it up again as FIXMessage.fromstring does
+                parsed.append((result[1] or FIX.FIXMessage)(**result[0]))
+
+        begin = end
+
+    return parsed
+
+
+cdef tuple _parse(const char *buf, Py_ssize_t mlen, cls, version, appl_ver_id, bint typed):
+    # the parts of the message of mlen bytes at buf, and the message
+    # class they're of, if the message names one
+    cdef Py_ssize_t start = 0, idx, end = 0, i, digits
+    cdef Py_ssize_t field_length = 0
+    cdef long number
+    cdef char soh, c
+    cdef dict parts = {}
+    cdef dict entries
+    cdef list dense
+    cdef Py_ssize_t ndense
+    cdef tuple entry, member
+    cdef dict members = None
+    cdef list instances = None
+    cdef dict current = None
+    cdef list stack = []
+
+    soh = buf[mlen - 1]   # could be \001, |, ^...
 
     # parse out BeginString so we know what we're working with
 
-    fix = FIX[version]
+    fix = None
+
+    if mlen > 2 and buf[0] == b'8' and buf[1] == b'=':
+        end = 2
+        while buf[end] != soh:
+            end += 1
+        value = PyBytes_FromStringAndSize(buf + 2, end - 2)
 
-    if message[:2] == '8=':
-        idx = 2
-        end = find(soh, idx)
-        value = message[idx:end]
+        # versions, and message types, already loaded are looked up in
+        # the registries directly, rather than through their get()
 
-        fix = FIX.get(value, fix)
+        fix = dict.get(FIX, value)
+        if fix is None:
+            fix = FIX.get(value)
 
         parts['BeginString'] = value
         start = end + 1
 
+    # only fall back to (and possibly register) the default version
+    # if the BeginString didn't name one we know about
+
+    if fix is None:
+        fix = FIX[version]
+
+    fields = fix.Fields
+    dense = fields._dense
+    ndense = len(dense)
+
+    _all = None
     if cls:
         _all = cls._all
 
-    field_length = 0
-    group = None
-    stack = []
-    fidx = -1
+    entries = _entries(fix, _all)
+
+    # MsgType of an application message under a transport, until
+    # we know which application version defines it
+
+    pending = None
 
     while start < mlen and end > -1:
 
         # between start and idx lies our tag number
         # between idx and end lies our tag value
 
-        idx = find('=', start)
-        number = message[start:idx]
+        idx = start
+        while idx < mlen and buf[idx] != b'=':
+            idx += 1
+        if idx == mlen:
+            break
 
         # get the number following the very last soh
 
-        number = number[number.rfind(soh) + 1:]
+        i = idx
+        while i > start and buf[i - 1] != soh:
+            i -= 1
 
-        end = find(soh, idx + field_length + 1)
-        value = message[idx + 1:end]
-        start = end + 1
-
-        #print idx, end, start
+        end = idx + field_length + 1
+        while end < mlen and buf[end] != soh:
+            end += 1
+        if end >= mlen:
+            # a LENGTH longer than the rest of the message
+            end = -1
+            value = PyBytes_FromStringAndSize(buf + idx + 1, max(mlen - idx - 2, 0))
+            start = 0
+        else:
+            value = PyBytes_FromStringAndSize(buf + idx + 1, end - idx - 1)
+            start = end + 1
 
         # if there's no number or value (i.e., \001=\001)
         # just skip it
 
-        if not number and not value:
+        if i == idx and not value:
             continue
 
-        if not number.isdigit():
+        number = 0
+        digits = 0
+        while i < idx and b'0' <= buf[i] <= b'9':
+            if digits < 9:
+                number = number * 10 + (buf[i] - 48)
+            digits += 1
+            i += 1
+
+        if i < idx or digits == 0:
             start = idx + 1
             continue
 
-        try:
-            field = fix.Fields[number]
-            field_length = int(value) if field.type == 'LENGTH' and number != '9' and value.isdigit() else 0
-        except KeyError:
-            # needs testing
-            field = make_field(number)
+        if digits > 9:
+            tag = int(PyBytes_FromStringAndSize(buf + idx - digits, digits))
+        else:
+            tag = number
+
+        # Under a transport such as FIXT.1.1, the ApplVerID naming the
+        # application version follows the MsgType in the header, so
+        # only pick the application dictionary once the header ends.
+
+        if pending is not None:
+            if tag == 1128:
+                appl_ver_id = value
+            elif tag not in header_tags:
+                fix = _dispatch(fix, pending, appl_ver_id)
+                fields = fix.Fields
+                dense = fields._dense
+                ndense = len(dense)
+                cls = fix.Messages.get(pending, FIX.FIXMessage)
+                _all = cls._all or fix
+                entries = _entries(fix, _all)
+                pending = None
+
+        # the registry's field for the tag, its name, its table in the
+        # message (if a group), if it's a LENGTH, and its kind, looked
+        # up once
+
+        field = dense[number] if digits <= 9 and number < ndense else fields.get(tag)
+        entry = entries.get(tag) if field is not None else None
+
+        if entry is None or entry[0] is not field:
+            entry = _entry(entries, tag, field, _all, buf + idx - digits, digits)
+
+        name = entry[1]
+
+        if entry[3] is not None:
+            field_length = 0
+            if entry[3] and value:
+                for i in range(idx + 1, idx + 1 + len(value)):
+                    c = buf[i]
+                    if not b'0' <= c <= b'9':
+                        field_length = 0
+                        break
+                    if field_length <= mlen:
+                        field_length = field_length * 10 + (c - 48)
 
         # get the Message class based on the value
 
-        if not cls and number == '35':
-            cls = fix.Messages.get(value, FIX.FIXMessage)
-            _all = cls._all or fix
+        if number == 35 and digits <= 9 and not cls:
+            if dict.get(fix, 'Applications') and value not in fix.Messages:
+                pending = value
+                header_tags = fix.HeaderTags
+            else:
+                cls = dict.get(fix.Messages, value)
+                if cls is None:
+                    cls = fix.Messages.get(value, FIX.FIXMessage)
+                _all = cls._all or fix
+                entries = _entries(fix, _all)
 
-        if cls and field.name in _all:
-            field = _all[field.name]
+        if typed and <unsigned char>entry[4] > RAW:
+            value = _decode(entry[4], value)
 
-        #   States:
+        # Repeating groups. members is the table of the innermost group
+        # the last field was in (see _members), instances its list of
+        # repetitions, current the last of them, and stack the same of
+        # each group it's nested in.
         #
-        #   1. regular field
-        #   2. start of repeating group
-        #   3. field in repeating group
-        #   3a. start of new group within repeating group
-        #   4. start of nested repeating group
-        #   5. field in nested repeating group
-
-        if stack and field.name in stack[-1]._all:
-            field = stack[-1]._all[field.name]
-
-        #print 'parsed', field.name, repr(value), issubclass(field, Group)
-
-        if not group and issubclass(field, Group):
-            #print 'start of new group', field.name
-            group = parts.setdefault(field.name, [])
-            group.append({})
-            stack.append(field)
-            field_order = field._all.keys()
-            #print group, stack
+        # A field ends each group it isn't a member of, innermost first.
+
+        member = None
+        while members is not None:
+            member = members.get(tag)
+            if member is not None:
+                break
+            if stack:
+                members, instances, current = stack.pop()
+            else:
+                members = None
+
+        if member is None:
+            if entry[2] is None:
+                parts[name] = value
+                continue
+
+            # start of a repeating group
+
+            members = entry[2]
+            instances = parts.setdefault(name, [])
+            current = {}
+            instances.append(current)
             continue
 
-        elif group and issubclass(field, Group):
-            #print group
+        # the group's first field, its delimiter, starts the next
+        # repetition; so does a field the repetition already has (a
+        # group without its delimiter), rather than replacing it. Other
+        # fields out of order are kept in the repetition they're in.
 
-            if field.name in stack[-1]._all:
-                group[-1].setdefault(field.name, []).append({})
-            else:
-                #print 'clearing stack'
-                stack = []
-                group = parts.setdefault(field.name, [])
-                group.append({})
-
-            stack.append(field)
-            field_order = field._all.keys()
-            fidx = -1
-            #print group, stack
+        if (member[0] == 0 and current) or name in current:
+            current = {}
+            instances.append(current)
+
+        if member[2] is None:
+            current[name] = value
             continue
 
-        elif group and len(stack) == 1:
-            if field.name in stack[-1]._all:
+        # start of a nested repeating group
 
-                # if the field appears before the last parsed field
-                # in the repeating group, then we start a new field
+        stack.append((members, instances, current))
+        members = member[2]
+        instances = current.setdefault(name, [])
+        current = {}
+        instances.append(current)
 
-                if field_order.index(field.name) <= fidx:
-                    #print 'starting new group'
-                    group.append({})
+    return parts, cls
 
-                group[-1][field.name] = value
-                fidx = field_order.index(field.name)
-                continue
 
+cdef dict _project(const char *buf, Py_ssize_t mlen, tuple projection, version,
+                   appl_ver_id, bint typed):
+    # the parts of the message of mlen bytes at buf, of only the tags in
+    # projection (see _projection), the first of each, as _parse would
+    # parse them outside of a group
+    cdef bytes mask_bytes = projection[0], kinds_bytes
+    cdef const unsigned char *mask = <const unsigned char *>(<char *>mask_bytes)
+    cdef const unsigned char *kinds
+    cdef Py_ssize_t nmask = len(mask_bytes), nkinds
+    cdef Py_ssize_t remaining = projection[2]
+    cdef Py_ssize_t start = 0, idx, end = 0, vend, i, digits
+    cdef Py_ssize_t field_length = 0
+    cdef long number
+    cdef unsigned char kind
+    cdef char soh
+    cdef bint wanted, transport
+    cdef dict parts = {}, entries, sparse
+    cdef list dense
+    cdef Py_ssize_t ndense
+    cdef tuple entry
+    cdef frozenset extra = projection[1]
+
+    soh = buf[mlen - 1]
+
+    fix = None
+
+    if mlen > 2 and buf[0] == b'8' and buf[1] == b'=':
+        end = 2
+        while buf[end] != soh:
+            end += 1
+        value = PyBytes_FromStringAndSize(buf + 2, end - 2)
+
+        fix = dict.get(FIX, value)
+        if fix is None:
+            fix = FIX.get(value)
+
+        if nmask > 8 and mask[8]:
+            parts['BeginString'] = value
+            remaining -= 1
+        start = end + 1
+
+    if fix is None:
+        fix = FIX[version]
+
+    fields = fix.Fields
+    dense = fields._dense
+    ndense = len(dense)
+    entries = _entries(fix, None)
+    kinds_bytes, sparse = _kinds(fields)
+    kinds = <const unsigned char *>(<char *>kinds_bytes)
+    nkinds = len(kinds_bytes)
+
+    # under a transport, the MsgType (and ApplVerID) are parsed whether
+    # they're in the projection or not, to pick the application
+
+    transport = bool(dict.get(fix, 'Applications'))
+    pending = None
+
+    while start < mlen and remaining > 0:
+
+        # between start and idx lies our tag number
+        # between idx and vend lies our tag value
+
+        idx = start
+        while idx < mlen and buf[idx] != b'=':
+            idx += 1
+        if idx == mlen:
+            break
+
+        i = idx
+        while i > start and buf[i - 1] != soh:
+            i -= 1
+
+        end = idx + field_length + 1
+        while end < mlen and buf[end] != soh:
+            end += 1
+        if end >= mlen:
+            # a LENGTH longer than the rest of the message
+            vend = max(mlen - 1, idx + 1)
+            start = mlen
+        else:
+            vend = end
+            start = end + 1
+
+        if i == idx and vend == idx + 1:
+            continue
+
+        number = 0
+        digits = 0
+        while i < idx and b'0' <= buf[i] <= b'9':
+            if digits < 9:
+                number = number * 10 + (buf[i] - 48)
+            digits += 1
+            i += 1
+
+        if i < idx or digits == 0:
+            start = idx + 1
+            continue
+
+        if digits > 9:
+            tag = int(PyBytes_FromStringAndSize(buf + idx - digits, digits))
+        else:
+            tag = None
+
+        if pending is not None:
+            if tag is None:
+                tag = number
+            if tag == 1128:
+                appl_ver_id = PyBytes_FromStringAndSize(buf + idx + 1, vend - idx - 1)
+            elif tag not in header_tags:
+                fix = _dispatch(fix, pending, appl_ver_id)
+                fields = fix.Fields
+                dense = fields._dense
+                ndense = len(dense)
+                entries = _entries(fix, None)
+                kinds_bytes, sparse = _kinds(fields)
+                kinds = <const unsigned char *>(<char *>kinds_bytes)
+                nkinds = len(kinds_bytes)
+                pending = None
+
+        # a LENGTH is the length of the value of the next field
+
+        if digits <= 9 and number < nkinds:
+            kind = kinds[number]
+        else:
+            if tag is None:
+                tag = number
+            kind = _kind(sparse, fields, tag)
+
+        if kind:
+            field_length = 0
+            if kind == LENGTH:
+                for i in range(idx + 1, vend):
+                    if not b'0' <= buf[i] <= b'9':
+                        field_length = 0
+                        break
+                    if field_length <= mlen:
+                        field_length = field_length * 10 + (buf[i] - 48)
+
+        if digits <= 9 and number < nmask:
+            wanted = mask[number]
+        elif extra:
+            if tag is None:
+                tag = number
+            wanted = tag in extra
+        else:
+            wanted = 0
+
+        if not wanted and not (transport and digits <= 9 and number == 35):
+            continue
+
+        value = PyBytes_FromStringAndSize(buf + idx + 1, vend - idx - 1)
+
+        if transport and digits <= 9 and number == 35 and value not in fix.Messages:
+            pending = value
+            header_tags = fix.HeaderTags
+
+        if not wanted:
+            continue
+
+        if tag is None:
+            tag = number
+
+        field = dense[number] if digits <= 9 and number < ndense else fields.get(tag)
+        entry = entries.get(tag) if field is not None else None
+
+        if entry is None or entry[0] is not field:
+            entry = _entry(entries, tag, field, None, buf + idx - digits, digits)
+
+        name = entry[1]
+        if name not in parts:
+            if typed and kind > RAW:
+                value = _decode(kind, value)
+            parts[name] = value
+            remaining -= 1
+
+    return parts
+
+
+def scan_message(message, lengths=()):
+    '''
+    Find every field in a FIX message, without copying any of it.
+
+    Returns an ``array('l')`` of ``tag, start, end`` triples, one per
+    field in the order they appear, where ``message[start:end]`` is the
+    field's value. Like `parse_message`, the last byte of the message
+    is taken to be the field delimiter. Malformed fields (without a
+    numeric tag) are skipped.
+
+    :param message: The FIX message, as a str or any other object
+        supporting the buffer protocol (bytearray, memoryview, mmap).
+
+    :param lengths: Tag numbers of LENGTH fields, e.g. 95 (RawDataLength).
+        The value of the field following one of these is as long as it
+        says, and may contain the delimiter.
+    '''
+    cdef const unsigned char[:] buf = message
+    cdef Py_ssize_t n = buf.shape[0]
+    cdef Py_ssize_t i = 0, start, k = 0, count = 0
+    cdef long tag, length = -1
+    cdef unsigned char soh, c
+    cdef bint valid
+    cdef array.array offsets = array('l')
+
+    # there are only a handful of LENGTH tags, look them up in C
+    cdef long lens[64]
+    for tag in lengths:
+        if count < 64:
+            lens[count] = tag
+            count += 1
+
+    if n == 0:
+        return offsets
+
+    soh = buf[n - 1]
+
+    while i < n:
+
+        # the tag number, up to the '=', -1 if it isn't a number
+
+        start = i
+        tag = 0
+        while i < n and buf[i] != 61 and buf[i] != soh:
+            c = buf[i]
+            if 48 <= c <= 57 and 0 <= tag < 100000000:
+                tag = tag * 10 + (c - 48)
             else:
-                _ = stack.pop()
-                #print 'exiting repeating group', _.name
-                fidx = -1
-                if not stack:
-                    group = None
-                # we exited the repeating group, pass through
-
-        elif group and len(stack) > 1:
-            if field.name in stack[-1]._all:
-
-                if field_order.index(field.name) <= fidx:
-                    #print 'starting new nested group'
-                    group[-1][stack[-1].name].append({})
-
-                group[-1][stack[-1].name][-1][field.name] = value
-                fidx = field_order.index(field.name)
-                continue
+                tag = -1
+            i += 1
 
-            broke = 0
-            while stack:
-                _ = stack.pop()
-                field_order = stack[-1]._all.keys()
+        if i >= n:
+            break
 
-                #print 'exited nested repeating group', _.name
+        if buf[i] == soh:
+            # no '=', there's no field here
+            i += 1
+            continue
 
-                if stack and field.name in field_order:
-                    #print 'adding field to outer group', stack[-1].name
-                    if field_order.index(field.name) <= fidx:
-                        group.append({})
+        valid = i > start and tag >= 0
 
-                    group[-1][field.name] = value
-                    fidx = field_order.index(field.name)
-                    broke = 1
-                    break
+        i += 1
+        start = i
+
+        # the value, up to the delimiter, unless its length is known
+
+        if length >= 0 and start + length < n:
+            i = start + length
+        while i < n and buf[i] != soh:
+            i += 1
 
-                elif stack:
-                    # this is reached once a repeating group and nested
-                    # repeating group terminate
-                    #print 'in break'
-                    group = None
-                    stack = []
+        if valid:
+            array.resize_smart(offsets, k + 3)
+            offsets.data.as_longs[k] = tag
+            offsets.data.as_longs[k + 1] = start
+            offsets.data.as_longs[k + 2] = i
+            k += 3
+
+        length = -1
+        if valid and tag != 9 and _length_tag(tag, lens, count):
+            length = 0
+            for start in range(start, i):
+                c = buf[start]
+                if not 48 <= c <= 57:
+                    length = -1
                     break
+                length = length * 10 + (c - 48)
 
-            # this occurs when we're exiting a nested repeating group
-            # before the outer group ends.
+        i += 1
 
-            if broke:
-                continue
+    return offsets
 
-        #print 'adding field to parts', field.name, repr(value), start
-        parts[field.name] = value
 
-    return parts
+def find_tag(array.array offsets, long tag, Py_ssize_t start=0):
+    '''
+    Position (the index of its triple) of the first field numbered *tag*
+    in *offsets*, as returned by `scan_message`, from field *start* on.
+    Returns -1 if there isn't one.
+    '''
+    cdef Py_ssize_t i, n = len(offsets)
+    cdef long *data = offsets.data.as_longs
+    for i in range(3 * start, n, 3):
+        if data[i] == tag:
+            return i // 3
+    return -1
+
+
+def frame_message(message, Py_ssize_t start=0, delimiter=b'\x01'):
+    '''
+    Find the first complete message in *message*, a stream of messages
+    as a str or any other object supporting the buffer protocol, from
+    offset *start* on.
+
+    A message is framed by its BodyLength: it begins with the
+    BeginString (8=), followed by the BodyLength (9=), and ends with
+    the CheckSum (10=) that many bytes after it. Anything else before
+    a message, e.g. the rest of a corrupted one, is skipped.
+
+    Returns a ``(begin, end)`` tuple, where ``message[begin:end]`` is
+    the message. If there isn't a complete message, *end* is -1 and
+    *begin* is where the next message may begin, once there is more of
+    the stream (everything before it can be discarded).
+    '''
+    cdef const unsigned char[:] view
+    cdef const unsigned char *buf
+    cdef Py_ssize_t n, begin = start, end
+    cdef unsigned char soh
+
+    if len(delimiter) != 1:
+        raise ValueError('delimiter must be a single byte')
+    soh = ord(delimiter)
+
+    view = message
+    n = view.shape[0]
+    buf = &view[0] if n else NULL
+
+    end = _frame(buf, n, &begin, soh)
+    return begin, end
+
+
+cdef Py_ssize_t _frame(const unsigned char *buf, Py_ssize_t n, Py_ssize_t *start,
+                       unsigned char soh):
+    # the end of the first message from start[0] on, setting start[0]
+    # to where it begins, or -1 (see frame_message)
+    cdef Py_ssize_t begin = start[0], end
+
+    while True:
+
+        # the next BeginString
+
+        while begin + 1 < n and not (buf[begin] == 56 and buf[begin + 1] == 61):
+            begin += 1
+        if begin + 1 >= n:
+            # the last byte may be the start of the next message
+            start[0] = begin if begin < n and buf[begin] == 56 else n
+            return -1
+
+        end = _message_end(buf, n, begin, soh)
+        if end != -2:
+            start[0] = begin
+            return end
+
+        begin += 1
+
+
+cdef Py_ssize_t _message_end(const unsigned char *buf, Py_ssize_t n, Py_ssize_t begin,
+                             unsigned char soh):
+    # the end of the message beginning at begin, -1 if the rest of it
+    # isn't there yet, or -2 if there isn't a message there
+    cdef Py_ssize_t i = begin + 2, length = 0, digits = 0
+
+    while i < n and buf[i] != soh and buf[i] != 61:
+        i += 1
+    if i < n and buf[i] == 61:
+        # an '=' before the delimiter, this isn't a BeginString
+        return -2
+    if i + 2 >= n:
+        return -1
+
+    # the BodyLength
+
+    if buf[i + 1] != 57 or buf[i + 2] != 61:
+        return -2
+
+    i += 3
+    while i < n and 48 <= buf[i] <= 57:
+        if length <= n:
+            length = length * 10 + (buf[i] - 48)
+        digits += 1
+        i += 1
+    if i >= n:
+        return -1
+    if buf[i] != soh or digits == 0:
+        return -2
+
+    # the CheckSum, right after the body
+
+    i += 1 + length
+    if i + 3 >= n:
+        return -1
+    if buf[i] != 49 or buf[i + 1] != 48 or buf[i + 2] != 61:
+        return -2
+
+    i += 3
+    while i < n and 48 <= buf[i] <= 57:
+        i += 1
+    if i >= n:
+        return -1
+    if buf[i] != soh:
+        return -2
+
+    return i + 1
+
+
+cdef inline bint _length_tag(long tag, long *lens, Py_ssize_t count):
+    cdef Py_ssize_t i
+    for i in range(count):
+        if lens[i] == tag:
+            return 1
+    return 0
+
+
+# decoding tables of each repeating group
+
+cdef dict _groups = {}
+
+
+cdef dict _members(group):
+    # (position, name, table if a group) of each field in a repeating
+    # group, by tag, compiled from the spec once, down to its innermost
+    # nested groups
+    members = _groups.get(group)
+    if members is None:
+        members = {}
+        for i, (name, field) in enumerate(group._all.iteritems()):
+            members[int(field.number)] = (
+                i, name, _members(field) if issubclass(field, Group) else None)
+        _groups[group] = members
+    return members
+
+
+# entries of each registry's tags, by the fields of a message class
+
+cdef dict _tables = {}
+
+
+cdef dict _entries(fix, _all):
+    # the entries of *fix*'s tags as fields of *_all* (None until the
+    # message class is known)
+    key = (id(fix), id(_all))
+    table = _tables.get(key)
+    if table is None or table[0] is not fix or table[1] is not _all:
+        table = _tables[key] = (fix, _all, {})
+    return table[2]
+
+
+cdef tuple _entry(dict entries, tag, field, _all, const char *number, Py_ssize_t digits):
+    # (field, name, group, length, kind) for a tag: its field in the
+    # registry, its name, the table of its Group type in _all (or None,
+    # see _members), if it's a LENGTH (None if unknown, which keeps the
+    # length of the last one), and its kind (see _kinds)
+    if field is None:
+        field = make_field(PyBytes_FromStringAndSize(number, digits))
+        return (None, field.name, None, None, UNKNOWN)
+
+    name = field.name
+    group = _all[name] if _all is not None and name in _all else field
+    group = _members(group) if issubclass(group, Group) else None
+
+    entry = entries[tag] = (field, name, group, field.type == 'LENGTH' and tag != 9,
+                            _field_kind(field, tag))
+    return entry
+
+
+# the projections parse_message has been asked for, by tags
+
+cdef dict _projections = {}
+
+
+cdef tuple _projection(tags):
+    # (mask, extra, count) of the tag numbers in tags: mask a bytes of
+    # 1 for each tag below 65536, extra a frozenset of the others, and
+    # count the number of tags
+    try:
+        projection = _projections.get(tags)
+    except TypeError:
+        # a list, or other unhashable sequence of tags
+        tags = tuple(tags)
+        projection = _projections.get(tags)
+
+    if projection is None:
+        numbers = set(int(tag) for tag in tags)
+        mask = bytearray(max([n + 1 for n in numbers if 0 <= n < 65536] or [0]))
+        for n in numbers:
+            if 0 <= n < 65536:
+                mask[n] = 1
+        projection = (bytes(mask), frozenset(n for n in numbers if n >= 65536), len(numbers))
+
+        if len(_projections) >= 256:
+            _projections.clear()
+        _projections[tags] = projection
+
+    return projection
+
+
+# kind of each tag of a registry's fields: UNKNOWN, LENGTH if it's a
+# LENGTH (but BodyLength), or what its values are decoded to
+
+cdef dict _kind_tables = {}
+
+
+cdef tuple _kinds(fields):
+    # (dense, sparse) for a registry's Fields: dense a bytes of the
+    # kind of each tag of fields._dense, sparse a dict of the kinds of
+    # others, as they're looked up (see _kind)
+    dense = fields._dense
+    table = _kind_tables.get(id(fields))
+    if table is None or table[0] is not fields or table[1] != len(dense):
+        kinds = bytearray(len(dense))
+        for tag, field in enumerate(dense):
+            if field is not None:
+                kinds[tag] = _field_kind(field, tag)
+        table = _kind_tables[id(fields)] = (fields, len(dense), bytes(kinds), {})
+    return table[2:]
+
+
+cdef unsigned char _kind(dict sparse, fields, tag):
+    kind = sparse.get(tag)
+    if kind is None:
+        field = fields.get(tag)
+        kind = sparse[tag] = UNKNOWN if field is None else _field_kind(field, tag)
+    return kind
+
+
+cdef unsigned char _field_kind(field, tag):
+    if field.type == 'LENGTH' and tag != 9:
+        return LENGTH
+    return _type_kinds.get(field.type, RAW)
+
+
+def decode_value(type, value):
+    '''
+    Convert *value*, the raw value of a field of spec *type* (e.g.
+    ``'SEQNUM'`` or ``'UTCTIMESTAMP'``), as `parse_message` does when
+    *typed*:
+
+    - INT, SEQNUM, NUMINGROUP, DAYOFMONTH and LENGTH to an int
+    - PRICE, PRICEOFFSET and AMT to a `decimal.Decimal`
+    - FLOAT, QTY and PERCENTAGE to a float
+    - BOOLEAN (Y or N) to a bool
+    - UTCTIMESTAMP to a datetime, to the microsecond
+    - UTCDATEONLY and LOCALMKTDATE to a date
+    - UTCTIMEONLY to a time
+
+    Values of other types, and values that aren't valid for their type,
+    are returned as they are.
+
+    Prices and amounts are decimals so they're exactly what was sent
+    (most decimal fractions, e.g. 101.1, have no exact float). Numbers
+    are converted as Python does, regardless of the locale.
+    '''
+    kind = _type_kinds.get(type, RAW)
+    if kind == RAW or not isinstance(value, bytes):
+        return value
+    return _decode(kind, value)
+
+
+cdef object _decode(unsigned char kind, bytes value):
+    # value as the Python type of its kind, or as it is if it isn't a
+    # valid value of it
+    cdef const char *p = value
+    cdef Py_ssize_t n = len(value), i = 0
+    cdef long long number = 0
+    cdef Py_ssize_t dot
+    cdef long year, month, day, hour, minute, second, microsecond = 0
+
+    if n == 0:
+        return value
+
+    if kind == INT or kind == LENGTH:
+        if p[0] == b'-':
+            i = 1
+        if i == n:
+            return value
+        for i in range(i, n):
+            if not b'0' <= p[i] <= b'9':
+                return value
+            if n <= 18:
+                number = number * 10 + (p[i] - 48)
+        if n > 18:
+            # more digits than a long long is sure to hold
+            return int(value)
+        return -number if p[0] == b'-' else number
+
+    if kind == FLOAT or kind == DECIMAL:
+        # digits, with an optional sign and decimal point
+        if p[0] == b'-':
+            i = 1
+        if i == n:
+            return value
+        dot = n
+        for i in range(i, n):
+            if p[i] == b'.' and dot == n:
+                dot = i
+            elif not b'0' <= p[i] <= b'9':
+                return value
+        if n == 1 + (p[0] == b'-') and dot < n:
+            return value
+        if kind == FLOAT:
+            return float(value)
+        return _decimal(value, p[0] == b'-', dot)
+
+    if kind == BOOLEAN:
+        if n == 1 and p[0] == b'Y':
+            return True
+        if n == 1 and p[0] == b'N':
+            return False
+        return value
+
+    # YYYYMMDD-HH:MM:SS.sss, YYYYMMDD and HH:MM:SS.sss
+
+    if kind == TIMESTAMP:
+        if n < 17 or p[8] != b'-':
+            return value
+        year, month, day = _digits(p, 4), _digits(p + 4, 2), _digits(p + 6, 2)
+        i = 9
+    elif kind == DATE:
+        if n != 8:
+            return value
+        year, month, day = _digits(p, 4), _digits(p + 4, 2), _digits(p + 6, 2)
+        if not _valid_date(year, month, day):
+            return value
+        return date_new(year, month, day)
+    elif kind == TIME:
+        if n < 8:
+            return value
+        year = month = day = 1
+    else:
+        return value
+
+    if p[i + 2] != b':' or p[i + 5] != b':':
+        return value
+    hour, minute, second = _digits(p + i, 2), _digits(p + i + 3, 2), _digits(p + i + 6, 2)
+
+    # milliseconds, or finer, to the microsecond
+
+    i += 8
+    if i < n:
+        if p[i] != b'.':
+            return value
+        microsecond = _fraction(p + i + 1, n - i - 1)
+
+    # the C API doesn't check its arguments as the constructors do;
+    # leap seconds (:60) aren't valid either
+
+    if not _valid_date(year, month, day) or not 0 <= hour < 24 or \
+            not 0 <= minute < 60 or not 0 <= second < 60 or microsecond < 0:
+        return value
+
+    if kind == TIME:
+        return time_new(hour, minute, second, microsecond, None)
+    return datetime_new(year, month, day, hour, minute, second, microsecond, None)
+
+
+# Decimal(value) parses the value again, with a regular expression, in
+# pure Python; what it would set a Decimal up with is set directly, if
+# Decimal is the pure Python one of this Python version
+
+_object_new = object.__new__
+cdef bint _decimal_slots = getattr(Decimal, '__slots__', None) == (
+    '_exp', '_int', '_sign', '_is_special')
+
+
+cdef object _decimal(bytes value, bint negative, Py_ssize_t dot):
+    # a Decimal of value, digits with an optional sign, and a point at
+    # dot (or the length of value if there isn't one)
+    cdef Py_ssize_t n = len(value)
+    if not _decimal_slots:
+        return Decimal(value)
+
+    decimal = _object_new(Decimal)
+    decimal._sign = 1 if negative else 0
+    decimal._int = (value[negative:dot] + value[dot + 1:]).lstrip(b'0') or b'0'
+    decimal._exp = dot + 1 - n if dot < n else 0
+    decimal._is_special = False
+    return decimal
+
+
+cdef inline bint _valid_date(long year, long month, long day):
+    cdef long days
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return 0
+    if month == 2:
+        days = 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28
+    elif month in (4, 6, 9, 11):
+        days = 30
+    else:
+        days = 31
+    return day <= days
+
+
+cdef inline long _digits(const char *p, Py_ssize_t n):
+    # the number of n digits at p, or -1 if they aren't all digits
+    cdef long number = 0
+    cdef Py_ssize_t i
+    for i in range(n):
+        if not b'0' <= p[i] <= b'9':
+            return -1
+        number = number * 10 + (p[i] - 48)
+    return number
+
+
+cdef inline long _fraction(const char *p, Py_ssize_t n):
+    # the microseconds of the n digits of a fraction of a second at p,
+    # or -1 if there are none, or they aren't all digits
+    cdef long number = 0
+    cdef Py_ssize_t i
+    if n == 0:
+        return -1
+    for i in range(n):
+        if not b'0' <= p[i] <= b'9':
+            return -1
+        if i < 6:
+            number = number * 10 + (p[i] - 48)
+    for i in range(n, 6):
+        number *= 10
+    return number
 
 
 def make_field(number):
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+'''
+phixlib.stream
+~~~~~~~~~~~~~~
+
+This module contains `FIXStreamDecoder`, which decodes the messages in
+a stream of them, as read from a socket. Reads may end anywhere, in the
+middle of a message, or hold many messages.
+
+    >>> decoder = FIXStreamDecoder()
+    >>> decoder.feed(sock.recv(4096))
+    [8=FIX.4.2|9=..|35=D|...|10=..|, 8=FIX.4.2|9=..|35=8|...|10=..|]
+    >>> decoder.feed(sock.recv(4096))
+    []
+
+Messages are framed by their BodyLength (see
+`phixlib.parser.frame_message`), and parsed out of the bytes read, as
+they are. The rest of a message split across reads is added to, rather
+than copied with each read, and framed again from where it begins.
+
+'''
+from .fix import FIX
+from .parser import frame_message
+
+
+__all__ = ['FIXStreamDecoder']
+
+
+# bytes skipped before the buffer is trimmed, if no message was decoded
+
+TRIM_SIZE = 64 * 1024
+
+
+class FIXStreamDecoder(object):
+    '''
+    A decoder of a stream of FIX messages, delimited by *delimiter*.
+
+    :param cls: The `FIXMessage` class to decode messages as. By
+        default, each is decoded as the message its BeginString and
+        MsgType name.
+
+    :param view: If True, decode each message to a lazy
+        `phixlib.view.FIXMessageView` (see `FIXMessage.view`), rather
+        than parsing the whole of it.
+
+    :members: cls, view, delimiter
+    '''
+
+    def __init__(self, cls=None, view=False, delimiter='\001'):
+        self.cls = cls or FIX.FIXMessage
+        self.view = view
+        self.delimiter = delimiter
+
+        # what's been read of the stream after the last complete message,
+        # and where in it the next message may begin
+
+        self._buffer = bytearray()
+        self._offset = 0
+
+    def __len__(self):
+        '''
+        The number of bytes read of messages not yet complete.
+        '''
+        return len(self._buffer) - self._offset
+
+    def feed(self, data):
+        '''
+        Add *data*, read from the stream, and decode every message it
+        completes.
+
+        :returns: A list of the messages (or views), in the order they
+            are in the stream.
+        '''
+        buffer = self._buffer
+
+        # bytes of the stream, a read of it or, if a message is split
+        # across reads, what's left of the last reads and this one
+
+        if buffer:
+            buffer += data
+            data = buffer
+            start = self._offset
+        else:
+            start = 0
+
+        frames = []
+
+        while True:
+            start, end = frame_message(data, start, self.delimiter)
+            if end < 0:
+                break
+            frames.append((start, end))
+            start = end
+
+        messages = [self._decode(data, begin, end) for begin, end in frames]
+
+        if data is buffer:
+            # drop the messages decoded, or what's been skipped once
+            # there's enough of it
+            if frames or start >= TRIM_SIZE:
+                del buffer[:start]
+                start = 0
+            self._offset = start
+        else:
+            # keep the rest of the read, the messages are decoded from
+            # the bytes as they are
+            buffer += memoryview(data)[start:]
+            self._offset = 0
+
+        return messages
+
+    def _decode(self, data, start, end):
+        if self.view:
+            # a view keeps its message, which outlives the buffer
+            return self.cls.view(memoryview(data)[start:end].tobytes())
+        return self.cls.fromstring(memoryview(data)[start:end])
+
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+'''
+phixlib.template
+~~~~~~~~~~~~~~~~
+
+This module contains `FIXTemplate`, a message whose fields are all
+formatted once, except for the few that change between messages.
+
+    >>> order = FIX.FIX42.NewOrderSingle.template(
+    ...     'MsgSeqNum', 'SendingTime', 'ClOrdID', 'Price', 'OrderQty',
+    ...     SenderCompID='GW', TargetCompID='EX', HandlInst='1', Symbol='IBM',
+    ...     Side='1', OrdType='2')
+    >>> order
+    8=FIX.4.2|9=..|35=D|49=GW|56=EX|34={MsgSeqNum}|52={SendingTime}|11={ClOrdID}|...
+    >>> order.format(MsgSeqNum=2, SendingTime='20150406-18:23:24.381',
+    ...              ClOrdID='C1', Price='10.5', OrderQty=100)
+    '8=FIX.4.2\\x019=..\\x0135=D\\x01...'
+
+The formatted message is the same as that of a `FIXMessage` created
+with the same fields. The BodyLength and CheckSum are those of the
+static fields, kept from when the template was made, plus those of the
+values given.
+
+'''
+import re
+
+
+__all__ = ['FIXTemplate']
+
+
+# stands in for a variable's value while the template is formatted
+
+_PLACEHOLDER = '\000{0}\000'
+_PLACEHOLDERS = re.compile('\000(\\d+)\000')
+
+
+class FIXTemplate(object):
+    '''
+    A template of *cls*, a `FIXMessage` class, with *fields* (by name,
+    as `FIXMessage` takes them) and the names of *variables*, the
+    fields given a value every time the template is formatted. A
+    variable can be any field of the message, its header or trailer,
+    other than a repeating group.
+
+    :members: cls, variables
+    '''
+
+    def __init__(self, cls, variables, **fields):
+        for i, name in enumerate(variables):
+            fields[name] = _PLACEHOLDER.format(i)
+
+        message = cls(**fields)
+        self.cls = type(message)
+
+        # everything between the BodyLength and CheckSum, split around
+        # the variables (in the order they're in the message)
+
+        formatted = str(message)
+        self._begin = str(message.header._begin_string())
+        start = formatted.index('\001', len(self._begin)) + 1
+        end = formatted.rindex('\00110=') + 1
+
+        parts = _PLACEHOLDERS.split(formatted[start:end])
+        self.variables = tuple(variables[int(i)] for i in parts[1::2])
+
+        for name in variables:
+            if self.variables.count(name) != 1:
+                raise KeyError(name)
+
+        self._parts = parts
+        self._sum = sum(bytearray(''.join(parts[::2])))
+
+    def __repr__(self):
+        '''
+        Format this template in a human-readable form, with each
+        variable's name in braces in place of its value.
+        '''
+        m = self._parts[:]
+        m[1::2] = ('{%s}' % (name, ) for name in self.variables)
+        return '{0}9=..|{1}10=..|'.format(self._begin, ''.join(m)).replace('\001', '|')
+
+    def format(self, **values):
+        '''
+        Format a message, with *values* for every variable, by name. A
+        value of None is formatted as an empty value.
+
+        :returns: A raw FIX message, as `str(FIXMessage)` formats it.
+        '''
+        variables = ['' if values[name] is None else str(values[name])
+                     for name in self.variables]
+
+        m = self._parts[:]
+        m[1::2] = variables
+        body = ''.join(m)
+
+        head = '{0}9={1}\001'.format(self._begin, len(body))
+        checksum = sum(bytearray(head)) + self._sum + \
+            sum(bytearray(''.join(variables)))
+
+        return '{0}{1}10={2:03d}\001'.format(head, body, checksum % 256)
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+'''
+phixlib.view
+~~~~~~~~~~~~
+
+This module contains `FIXMessageView`, a lazy, read-mostly message
+backed by the raw message it was created from. Creating a view only
+finds where each field is (see `phixlib.parser.scan_message`); values
+are sliced out, and `Field` objects created, as they are accessed.
+
+    >>> view = FIX.FIXMessage.view('8=FIX.4.2|9=..|35=D|...|55=IBM|...')
+    >>> view.get('Symbol')
+    55=IBM|
+    >>> str(view) == '8=FIX.4.2|9=..|35=D|...|55=IBM|...'
+    True
+
+A view supports the same get, set, contains and iteration as a
+`FIXMessage`. Unless a field is modified, or set, `str()` returns the
+raw message unchanged. Repeating groups are not structured in a view:
+iterating over it yields every field as it appears on the wire, and
+getting a tag returns its first occurrence. Use `parse` for a
+`FIXMessage` of the whole message.
+
+'''
+from .fix import FIX, FIXMeta, Field, Group, _dispatch
+from .parser import find_tag, make_field, scan_message
+
+
+__all__ = ['FIXMessageView']
+
+
+class FIXMessageView(object):
+    '''
+    A lazy view of a raw FIX *message*, which may be a str or any other
+    object supporting the buffer protocol (bytearray, memoryview, mmap).
+
+    :param cls: The `FIXMessage` class to view the message as. If None,
+        it is determined by the BeginString and MsgType, falling back to
+        *version* (see `phixlib.parser.parse_message`).
+
+    :members: cls, msgtype, name, version, raw
+    '''
+
+    def __init__(self, message, cls=None, version='FIX.4.2', appl_ver_id=None):
+        self.raw = message
+        self._soh = self._slice(len(message) - 1, len(message))
+
+        # versions, and message types, already loaded are looked up in
+        # the registries directly, rather than through their get()
+
+        registry = None
+        if self._slice(0, 2) == '8=':
+            end = self._find(self._soh, 2)
+            begin_string = self._slice(2, end)
+            registry = dict.get(FIX, begin_string)
+            if registry is None:
+                registry = FIX.get(begin_string)
+        if registry is None:
+            registry = FIX[version]
+
+        self._offsets = scan_message(message, _lengths(registry))
+        self._fields = {}
+        self._added = []
+
+        if cls is None:
+            msgtype = self._value(35)
+            if msgtype is not None:
+                registry = _dispatch(registry, msgtype, self._value(1128) or appl_ver_id)
+                cls = dict.get(registry.Messages, msgtype)
+                if cls is None:
+                    cls = registry.Messages.get(msgtype)
+            cls = cls or registry.FIXMessage
+
+        self.cls = cls
+        self._registry = registry
+
+    @property
+    def msgtype(self):
+        return self.cls.msgtype
+
+    @property
+    def name(self):
+        return self.cls.name
+
+    @property
+    def version(self):
+        return self.cls.version
+
+    def __contains__(self, item):
+        '''
+        Check if item is in the message. Item can be a tag, name,
+        number, or `Field` instance.
+        '''
+        if isinstance(item, Field):
+            # check identity versus equality, as FIXMixIn does
+            return any(f is item for f in self._fields.itervalues()) or \
+                any(f is item for f in self._added)
+        return self._position(self._number(item)) is not None or \
+            self._added_field(self._number(item)) is not None
+
+    def __iter__(self):
+        '''
+        Iterate over every field in the message, in wire order.
+        '''
+        trailer = self._trailer()
+        for position in xrange(len(self._offsets) // 3):
+            if position == trailer:
+                for field in self._added:
+                    yield field
+            yield self._field(position)
+        if trailer is None:
+            for field in self._added:
+                yield field
+
+    def __len__(self):
+        '''
+        Calculates the true BodyLength of the message.
+        '''
+        if self.modified:
+            return len(self._body())
+        start, end = self._body_offsets()
+        return end - start
+
+    def __repr__(self):
+        '''
+        Format this message in a human-readable form (SOH delimiters
+        are represented as the pipe '|' character).
+        '''
+        return str(self).replace(self._soh, '|')
+
+    def __str__(self):
+        '''
+        The raw message, unless it has been modified, in which case the
+        BodyLength and CheckSum are calculated again.
+        '''
+        if not self.modified:
+            if isinstance(self.raw, str):
+                return self.raw
+            return self._slice(0, len(self.raw))
+
+        body = self._body()
+        m = '8={0}{1}9={2}{1}{3}'.format(self._value(8) or self.version,
+                                          self._soh, len(body), body)
+        checksum = sum(bytearray(m.replace(self._soh, '\001'))) % 256
+        return m + '10={0:03d}{1}'.format(checksum, self._soh)
+
+    @property
+    def modified(self):
+        '''
+        True if a field was set, or a field's value changed.
+        '''
+        if self._added:
+            return True
+        for position, field in self._fields.iteritems():
+            start, end = self._offsets[3 * position + 1:3 * position + 3]
+            if field.value != self._slice(start, end):
+                return True
+        return False
+
+    def get(self, tag):
+        '''
+        Get a tag by name, number or `Field` type. Returns the first
+        occurrence of the tag, as a `phixlib.Field`, or None.
+        '''
+        if isinstance(tag, Field):
+            tag = type(tag)
+        number = self._number(tag)
+        position = self._position(number)
+        if position is None:
+            return self._added_field(number)
+        return self._field(position)
+
+    def set(self, tag, value):
+        '''
+        Set the value of a tag (by name, number or `Field` type), adding
+        it to the end of the message body if it isn't in the message.
+
+        :returns: A `phixlib.Field`
+        '''
+        field = self.get(tag)
+        if field is not None:
+            field.value = value
+            return field
+
+        number = self._number(tag)
+        if number is None:
+            return None
+
+        field = self._type(number)(value)
+        self._added.append(field)
+        return field
+
+    def parse(self, **kwargs):
+        '''
+        Parse the whole message into a `FIXMessage`, as
+        `FIXMessage.fromstring` would.
+        '''
+        return self.cls.fromstring(str(self), **kwargs)
+
+    # Internals
+
+    def _slice(self, start, end):
+        value = self.raw[start:end]
+        if isinstance(value, str):
+            return value
+        if isinstance(value, memoryview):
+            return value.tobytes()
+        return str(value)
+
+    def _find(self, sub, start):
+        if hasattr(self.raw, 'find'):
+            return self.raw.find(sub, start)
+        return self._slice(start, start + 64).find(sub) + start
+
+    def _value(self, number):
+        position = self._position(number)
+        if position is None:
+            return None
+        start, end = self._offsets[3 * position + 1:3 * position + 3]
+        return self._slice(start, end)
+
+    def _position(self, number):
+        # position of the first occurrence of a tag number
+        # A view is mostly for reading a few tags, a scan of the tags
+        # (in C) is cheaper than building an index of all of them.
+        try:
+            position = find_tag(self._offsets, number)
+        except (TypeError, OverflowError):
+            return None
+        return None if position < 0 else position
+
+    def _field(self, position):
+        try:
+            return self._fields[position]
+        except KeyError:
+            tag, start, end = self._offsets[3 * position:3 * position + 3]
+            field = self._fields[position] = self._type(tag)(self._slice(start, end))
+            return field
+
+    def _added_field(self, number):
+        for field in self._added:
+            if int(field.number) == number:
+                return field
+
+    def _type(self, number):
+        # the message's own type for the tag, or the version's; groups
+        # are flat in a view, so a group's tag is just the count
+        cls = self.cls
+        for numbers in (cls._numbers, cls.Header._numbers, cls.Trailer._numbers):
+            field = numbers.get(str(number))
+            if field is not None and not issubclass(field, Group):
+                return field
+        return self._registry.Fields.get(number) or make_field(str(number))
+
+    def _number(self, tag):
+        # the tag number of a name, number, or Field type
+        if isinstance(tag, type) and issubclass(tag, Field):
+            return int(tag.number)
+        if isinstance(tag, (int, long)):
+            return tag
+        if isinstance(tag, basestring):
+            if tag.isdigit():
+                return int(tag)
+            for all_ in (self.cls._all, self.cls.Header._all, self.cls.Trailer._all):
+                if tag in all_:
+                    return int(all_[tag].number)
+            field = self._registry.get(tag)
+            if isinstance(field, FIXMeta) and issubclass(field, Field):
+                return int(field.number)
+        return None
+
+    def _trailer(self):
+        # position of the first trailer field, where fields are added
+        numbers = self.cls.Trailer._numbers
+        offsets = self._offsets
+        for position in xrange(len(offsets) // 3):
+            if str(offsets[3 * position]) in numbers:
+                return position
+
+    def _body_offsets(self):
+        # from after the BodyLength to the first trailer field
+        offsets = self._offsets
+        start = 0
+        end = len(self.raw)
+        for position in xrange(len(offsets) // 3):
+            tag, value_start, value_end = offsets[3 * position:3 * position + 3]
+            if tag == 9:
+                start = value_end + 1
+            elif tag == 10:
+                end = value_start - 3
+                break
+        return start, end
+
+    def _body(self):
+        # the modified message between BodyLength and CheckSum
+        m = []
+        soh = self._soh
+        trailer = self._trailer()
+        for position in xrange(len(self._offsets) // 3):
+            tag, start, end = self._offsets[3 * position:3 * position + 3]
+            if position == trailer:
+                m.extend('{0}={1}{2}'.format(f.number, _value(f), soh) for f in self._added)
+            if tag in (8, 9, 10):
+                continue
+            field = self._fields.get(position)
+            if field is None:
+                m.append('{0}={1}{2}'.format(tag, self._slice(start, end), soh))
+            else:
+                m.append('{0}={1}{2}'.format(tag, _value(field), soh))
+        if trailer is None:
+            m.extend('{0}={1}{2}'.format(f.number, _value(f), soh) for f in self._added)
+        return ''.join(m)
+
+
+def _value(field):
+    return '' if field.value is None else field.value
+
+
+def _lengths(registry):
+    # LENGTH tags, the value of the field following one of them may
+    # contain the delimiter (e.g. RawDataLength and RawData)
+    lengths = dict.get(registry, 'LengthTags')
+    if lengths is None:
+        lengths = registry['LengthTags'] = frozenset(
+            tag for tag, field in registry.Fields.iteritems()
+            if field.type == 'LENGTH')
+    return lengths
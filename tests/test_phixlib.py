@@ -1,9 +1,41 @@
 # -*- coding: utf-8 -*-
+from collections import Counter
+from decimal import Decimal
 from pprint import pprint
+import datetime
+import locale
+import operator
+import os
+import shutil
+import tempfile
 
-from phixlib import FIX
-from phixlib.fix import Field, FIXMessage, Group
-from phixlib.parser import parse_message
+from phixlib import FIX, dictionary, generators
+from phixlib.dictionary import load_dictionary
+from phixlib.fix import Field, FIXMessage, Group, TagTable
+from phixlib.logscan import reduce_log, scan_log, split_log
+from phixlib.parser import decode_value, parse_many, parse_message
+from phixlib.stream import TRIM_SIZE, FIXStreamDecoder
+
+
+# dictionaries loaded by the tests are cached in a directory of their own
+
+_cache_dir = None
+_environ = None
+
+
+def setup_module(module):
+    global _cache_dir, _environ
+    _cache_dir = tempfile.mkdtemp()
+    _environ = os.environ.get('PHIXLIB_CACHE_DIR')
+    os.environ['PHIXLIB_CACHE_DIR'] = _cache_dir
+
+
+def teardown_module(module):
+    if _environ is None:
+        del os.environ['PHIXLIB_CACHE_DIR']
+    else:
+        os.environ['PHIXLIB_CACHE_DIR'] = _environ
+    shutil.rmtree(_cache_dir)
 
 
 def test_registry():
@@ -72,6 +104,231 @@ def test_registry():
     assert FIX.get_message_type(FIX.FIX42.NewOrderSingle.name) == FIX.FIX42.NewOrderSingle.msgtype
     assert not FIX.get_message_type('_')
 
+def test_dictionary_cache():
+    spec = os.path.join(os.path.dirname(__file__), '..', 'phixlib', 'spec', 'FIX42.xml')
+    with open(spec, 'rb') as f:
+        content = f.read()
+
+    cache_dir = tempfile.mkdtemp()
+    environ = os.environ.get('PHIXLIB_CACHE_DIR')
+    os.environ['PHIXLIB_CACHE_DIR'] = cache_dir
+
+    try:
+        compiled = load_dictionary(spec, cache=False)
+        assert load_dictionary(content, cache=False) == compiled
+        with open(spec, 'rb') as f:
+            assert load_dictionary(f, cache=False) == compiled
+        assert not os.listdir(cache_dir)
+
+        assert compiled['version'] == 'FIX.4.2'
+        fields = dict((attrib['name'], (attrib, enums)) for attrib, enums in compiled['fields'])
+        assert fields['OrdType'][0] == {'number': '40', 'name': 'OrdType', 'type': 'CHAR'}
+        assert fields['OrdType'][1][0] == ('1', 'MARKET')
+        assert ('field', 'BeginString', True, None) == compiled['header'][0]
+        assert ('field', 'CheckSum', True, None) == compiled['trailer'][-1]
+
+        # the first load compiles and caches, the rest come from the cache
+
+        assert load_dictionary(spec) == compiled
+        assert len(os.listdir(cache_dir)) == 1
+        assert load_dictionary(content) == compiled
+        with open(spec, 'rb') as f:
+            assert load_dictionary(f) == compiled
+        assert len(os.listdir(cache_dir)) == 1
+
+        # a changed specification is compiled again
+
+        changed = load_dictionary(content.replace("name='OrdType'", "name='OrderType'"))
+        assert changed != compiled
+        assert len(os.listdir(cache_dir)) == 2
+
+        # corrupt cache entries are ignored and rewritten
+
+        for name in os.listdir(cache_dir):
+            with open(os.path.join(cache_dir, name), 'wb') as f:
+                f.write('\x00garbage')
+        assert load_dictionary(spec) == compiled
+
+        # nothing is left behind if an entry can't be written
+
+        entries = sorted(os.listdir(cache_dir))
+        os.mkdir(os.path.join(cache_dir, 'entry'))
+        dictionary._write_cache(os.path.join(cache_dir, 'entry'), compiled)
+        assert sorted(os.listdir(cache_dir)) == sorted(entries + ['entry'])
+
+    finally:
+        if environ is None:
+            del os.environ['PHIXLIB_CACHE_DIR']
+        else:
+            os.environ['PHIXLIB_CACHE_DIR'] = environ
+        shutil.rmtree(cache_dir)
+
+
+def test_lazy_registration():
+    # bundled specifications are known, but not registered until used
+
+    for version in ('FIX.4.0', 'FIX40', 'FIX.4.1', 'FIX41', 'FIX.5.0SP2',
+                    'FIX50SP2', 'FIXT.1.1', 'FIXT11'):
+        assert version in FIX
+
+    assert not dict.__contains__(FIX, 'FIX.4.0')
+    assert not dict.__contains__(FIX, 'FIX.4.1')
+    assert 'FIX40' not in FIX._versions
+
+    assert FIX.FIX40.Heartbeat.msgtype == '0'
+    assert dict.__contains__(FIX, 'FIX.4.0')
+    assert dict.__contains__(FIX, 'FIX40')
+    assert 'FIX40' in FIX._versions
+    assert FIX['FIX.4.0'] is FIX.FIX40
+
+    # the parser registers the version named by the BeginString
+
+    parts = parse_message('8=FIX.4.1|9=5|35=0|10=000|')
+    assert parts['MsgType'] == '0'
+    assert dict.__contains__(FIX, 'FIX.4.1')
+    assert FIX.get('FIX.4.1') is FIX.FIX41
+
+    # service packs are registered as versions of their own
+
+    assert FIX['FIX.5.0SP2'].NewOrderSingle.__module__ == 'FIX.FIX50SP2'
+    assert FIX.FIX50SP2 is not FIX.get('FIX.5.0')
+
+    assert 'FIX.9.9' not in FIX
+    assert FIX.get('FIX.9.9') is None
+
+    try:
+        FIX.FIX99
+    except AttributeError:
+        pass
+    else:
+        assert False, 'FIX.FIX99 should not exist'
+
+    try:
+        FIX['FIX.9.9']
+    except KeyError:
+        pass
+    else:
+        assert False, "FIX['FIX.9.9'] should not exist"
+
+
+def test_lazy_messages():
+    # message types are generated the first time they're looked up
+
+    registry = FIX.FIX43
+    messages = FIX.FIX43.Messages
+
+    assert not dict.__contains__(messages, 'SecurityDefinition')
+    assert not dict.__contains__(messages, 'd')
+    assert not dict.__contains__(registry, 'SecurityDefinition')
+
+    assert 'SecurityDefinition' in registry
+    assert 'SecurityDefinition' in messages
+    assert 'd' in messages
+
+    cls = messages['d']
+    assert cls.name == 'SecurityDefinition'
+    assert cls.msgtype == 'd'
+    assert issubclass(cls.Symbol, Field)   # expanded from the Instrument component
+
+    # every alias resolves to the same, single, class
+
+    assert dict.__contains__(messages, 'SecurityDefinition')
+    assert dict.__contains__(registry, 'SecurityDefinition')
+    assert messages.SecurityDefinition is cls
+    assert messages.get('SecurityDefinition') is cls
+    assert registry.SecurityDefinition is cls
+    assert registry['SecurityDefinition'] is cls
+
+    assert messages.get('NotAMessage') is None
+    assert 'NotAMessage' not in messages
+
+    # so does the parser
+
+    parts = parse_message('8=FIX.4.3|9=5|35=c|10=000|')
+    assert parts['MsgType'] == 'c'
+    assert dict.__contains__(messages, 'c')
+    assert FIX.FIXMessage.fromstring('8=FIX.4.3|9=5|35=c|10=000|').__class__ is messages.c
+
+    # iterating generates everything
+
+    assert set(messages.itervalues()) == set(dict.itervalues(messages))
+    assert len(messages) == 2 * len(set(messages.values()))
+    assert all(issubclass(m, FIXMessage) for m in messages.values())
+
+
+def test_components():
+    # components expand to the same types in every message using them
+
+    order = FIX.FIX43.NewOrderSingle
+    report = FIX.FIX43.ExecutionReport
+
+    assert issubclass(order.Symbol, FIX.FIX43.Symbol)
+    assert order.Symbol is report.Symbol        # Instrument
+    assert order.NoSecurityAltID is report.NoSecurityAltID
+    assert issubclass(order.NoSecurityAltID, Group)
+    assert order.NoSecurityAltID._all.keys() == ['SecurityAltID', 'SecurityAltIDSource']
+
+    assert order.NoSecurityAltID.SecurityAltID is order.NoSecurityAltID._all['SecurityAltID']
+
+    # fields declared directly in a message are still its own
+
+    assert order.ClOrdID is not report.ClOrdID
+    assert order.ClOrdID.required != report.ClOrdID.required
+
+
+def test_interning():
+    # a field defined identically by several versions shares its
+    # definition, and only the version differs
+
+    assert FIX.FIX42.Symbol is not FIX.FIX44.Symbol
+    assert FIX.FIX42.Symbol.__bases__ == FIX.FIX44.Symbol.__bases__
+    assert FIX.FIX42.Symbol.version == 'FIX.4.2'
+    assert FIX.FIX44.Symbol.version == 'FIX.4.4'
+    assert FIX.FIX42.Symbol.__module__ == 'FIX.FIX42'
+    assert FIX.FIX42.Fields['55'] is FIX.FIX42.Symbol
+
+    assert FIX.FIX42.HandlInst.enums is FIX.FIX44.HandlInst.enums
+    assert FIX.FIX42.PossDupFlag.enums is FIX.FIX42.PossResend.enums
+    assert FIX.FIX42.BeginString.generate_value() == 'FIX.4.2'
+    assert FIX.FIX44.BeginString.generate_value() == 'FIX.4.4'
+
+    # so does every message requiring (or not) the same field
+
+    order = FIX.FIX42.NewOrderSingle
+    report = FIX.FIX42.ExecutionReport
+
+    assert order.Symbol is report.Symbol
+    assert order.Symbol.required is True
+    assert order.Symbol.version == 'FIX.4.2'
+    assert order.OrdType.MARKET == '1'
+
+
+def test_tag_table():
+    fields = FIX.FIX42.Fields
+
+    assert fields[55] is fields['55'] is FIX.FIX42.Symbol
+    assert fields.get(55) is FIX.FIX42.Symbol
+    assert 55 in fields and '55' in fields
+    assert -1 not in fields and 'Symbol' not in fields
+    assert fields.get(-1) is None
+    assert fields.get(100000) is None
+    assert len(fields) == len(fields.keys())
+    assert fields.keys() == sorted(fields.keys())
+
+    # user-defined tags live outside the dense table
+
+    tags = TagTable()
+    tags[9001] = FIX.FIX42.Symbol
+    tags['40'] = FIX.FIX42.OrdType
+
+    assert tags[9001] is tags['9001'] is FIX.FIX42.Symbol
+    assert tags.items() == [(40, FIX.FIX42.OrdType), (9001, FIX.FIX42.Symbol)]
+    assert len(tags) == 2
+
+    assert FIX.get_field_number(55) == '55'
+    assert FIX.get_field_name(55) == 'Symbol'
+
+
 def test_str():
     assert str(FIX.FIX42.OrdType(1)) == '40=1\001'
     assert repr(FIX.FIX42.OrdType(1)) == '40=1|'
@@ -681,6 +938,33 @@ def test_contains():
 
     assert not object() in order
 
+    # removed fields are no longer found by number either
+
+    order -= field
+    assert field_.number not in order
+    assert order.get(field_.number) is None
+
+
+def test_indexes():
+    cls = FIX.FIX42.NewOrderSingle
+
+    assert cls._numbers['11'] is cls.ClOrdID is cls._all['ClOrdID']
+    assert cls.NoAllocs._numbers['79'] is cls.NoAllocs.AllocAccount
+    assert '8' not in cls._numbers
+    assert cls.Header._numbers['8'] is cls.Header.BeginString
+
+    order = cls(ClOrdID='C1', Symbol='IBM')
+    assert order._initialized.numbers == {'11': 'ClOrdID', '55': 'Symbol'}
+
+    assert order.set(54, '1') is order.get(54) is order.get('Side')
+    assert order.set('54', '2').value == '2'
+    assert order.get(54).value == '2'
+    assert 54 in order and '54' in order
+
+    order._initialized.clear()
+    assert not order._initialized.numbers
+    assert 11 not in order
+
 
 def test_equality():
 
@@ -712,6 +996,633 @@ def test_equality():
     assert FIX.FIX42.NewOrderSingle.ClOrdID.number != '0'
 
 
+def test_compact_fields():
+    field = FIX.FIX42.NewOrderSingle.ClOrdID('C1')
+
+    # nothing but the value and group are stored until asked for
+
+    assert '__dict__' in Field.__slots__
+    assert FIX.FIX42.NewOrderSingle.ClOrdID.__slots__ == ()
+    assert not hasattr(field, '_mutations')
+
+    assert field.mutations == {}
+    assert field.mutations is field.mutations
+    field.mutations = {'value': 'C2'}
+    assert field.mutations == {'value': 'C2'}
+
+    group = FIX.FIX42.NewOrderSingle.NoAllocs({'AllocAccount': 'A1'}, {'AllocAccount': 'A2'})
+    assert FIX.FIX42.NewOrderSingle.NoAllocs.__slots__ == ('_initialized', )
+    assert group.value == 2
+    assert group.mutations == {}
+    assert group[1][0].group is group
+    assert repr(group[1][0]) == '79=A2|'
+
+
+def test_encoding_cache():
+    formatted = '8=FIX.4.2|9=65|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|10=211|'
+    order = FIX.FIX42.NewOrderSingle.fromstring(formatted)
+
+    # formatted once, until something changes
+
+    assert repr(order) == formatted and len(order) == 65
+    assert str(order) is str(order)
+
+    def changed(change, expected):
+        before = str(order)
+        change()
+        assert str(order) is not before
+        assert repr(order) == expected
+        assert len(order) == int(expected.split('|')[1][2:])
+        assert str(order) == str(FIX.FIX42.NewOrderSingle.fromstring(str(order)))
+
+    changed(lambda: setattr(order.get('Symbol'), 'value', 'MSFT'),
+            '8=FIX.4.2|9=66|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=MSFT|54=1|10=054|')
+    changed(lambda: order.header.set('MsgSeqNum', '2'),
+            '8=FIX.4.2|9=66|35=D|49=A|56=B|34=2|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=MSFT|54=1|10=055|')
+    changed(lambda: order.set('Price', '1.5'),
+            '8=FIX.4.2|9=73|35=D|49=A|56=B|34=2|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=MSFT|54=1|44=1.5|10=111|')
+    changed(lambda: order.__isub__(order.get('Price')),
+            '8=FIX.4.2|9=66|35=D|49=A|56=B|34=2|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=MSFT|54=1|10=055|')
+
+    # fields of repeating groups belong to the message too
+
+    changed(lambda: setattr(order.get('NoAllocs')[1][0], 'value', 'A3'),
+            '8=FIX.4.2|9=66|35=D|49=A|56=B|34=2|11=C1|78=2|79=A1|80=1|79=A3|80=2|55=MSFT|54=1|10=056|')
+    changed(lambda: order.get('NoAllocs').__delitem__(0),
+            '8=FIX.4.2|9=55|35=D|49=A|56=B|34=2|11=C1|78=1|79=A3|80=2|55=MSFT|54=1|10=062|')
+    group = FIX.FIX42.NewOrderSingle.NoAllocs({'AllocAccount': 'A4'})
+    changed(lambda: order.get('NoAllocs').__setitem__(0, group[0]),
+            '8=FIX.4.2|9=50|35=D|49=A|56=B|34=2|11=C1|78=1|79=A4|55=MSFT|54=1|10=098|')
+    changed(lambda: setattr(group[0][0], 'value', 'A5'),
+            '8=FIX.4.2|9=50|35=D|49=A|56=B|34=2|11=C1|78=1|79=A5|55=MSFT|54=1|10=099|')
+
+    changed(order._initialized.clear,
+            '8=FIX.4.2|9=20|35=D|49=A|56=B|34=2|10=144|')
+
+    # a field set in two messages is in both of them
+
+    first = FIX.FIX42.NewOrderSingle.fromstring(formatted)
+    second = FIX.FIX42.NewOrderSingle.fromstring(formatted)
+    symbol = first.get('Symbol')
+    second.set(symbol)
+    str(first), str(second)
+
+    symbol.value = 'AAPL'
+    expected = '8=FIX.4.2|9=66|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=AAPL|54=1|10=026|'
+    assert repr(first) == repr(second) == expected
+
+    second -= symbol
+    symbol.value = 'MSFT'
+    assert repr(first) == expected.replace('55=AAPL', '55=MSFT').replace('10=026', '10=054')
+    assert '55=' not in repr(second)
+
+
+def test_incremental_encoding():
+    formatted = '8=FIX.4.2|9=65|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|10=211|'
+    order = FIX.FIX42.NewOrderSingle.fromstring(formatted)
+    str(order)
+
+    # resending only formats the header again, the body is reused and
+    # the BodyLength and CheckSum are updated by the difference
+
+    body = order._format()
+    order.header.set('MsgSeqNum', '10')
+    order.header.set('PossDupFlag', 'Y')
+    assert order._format() is body
+    assert order._count() == (len(body), sum(bytearray(body)))
+
+    expected = '8=FIX.4.2|9=71|35=D|49=A|56=B|34=10|43=Y|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|10=254|'
+    assert repr(order) == expected and len(order) == 71
+
+    # changed fields are replaced where they are, added ones go last
+
+    parts = order._parts
+    order.get('NoAllocs')[0][0].value = 'A10'
+    order.set('Symbol', 'MSFT')
+    order.set('Price', '1.5')
+    assert order._parts is parts
+    assert parts[-4:] == ['80=2\001', '55=MSFT\001', '54=1\001', '44=1.5\001']
+
+    expected = '8=FIX.4.2|9=80|35=D|49=A|56=B|34=10|43=Y|11=C1|78=2|79=A10|80=1|79=A2|80=2|55=MSFT|54=1|44=1.5|10=202|'
+    assert repr(order) == expected
+
+    for part in (order.header, order, order.trailer):
+        part._invalidate()
+    assert repr(order) == expected
+
+    # fields BodyLength and CheckSum don't count are formatted again
+
+    for part, name, value, expected in [
+            ('header', 'BeginString', 'FIX.4.4',
+             '8=FIX.4.4|9=65|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|10=213|'),
+            ('header', 'BodyLength', '999', formatted),
+            ('trailer', 'CheckSum', '001', formatted)]:
+        order = FIX.FIX42.NewOrderSingle.fromstring(formatted)
+        str(order)
+        getattr(order, part).set(name, value)
+        assert repr(order) == expected
+
+        encoded = str(order)
+        for part in (order.header, order, order.trailer):
+            part._invalidate()
+        assert str(order) == encoded
+
+
+def test_template():
+    fields = dict(SenderCompID='A', TargetCompID='B', Symbol='IBM', Side='1', HandlInst='1')
+    template = FIX.FIX42.NewOrderSingle.template('MsgSeqNum', 'ClOrdID', 'Price', **fields)
+
+    assert template.cls is FIX.FIX42.NewOrderSingle
+    assert template.variables == ('MsgSeqNum', 'ClOrdID', 'Price')
+    assert repr(template) == '8=FIX.4.2|9=..|35=D|49=A|56=B|34={MsgSeqNum}|11={ClOrdID}|21=1|55=IBM|54=1|44={Price}|10=..|'
+
+    # the same message a FIXMessage with the same fields formats
+
+    for values in (dict(MsgSeqNum=1, ClOrdID='C1', Price='1.5'),
+                   dict(MsgSeqNum=1000, ClOrdID='C12345678', Price=10.25),
+                   dict(MsgSeqNum=2, ClOrdID='', Price='')):
+        order = FIX.FIX42.NewOrderSingle(**dict(fields, **values))
+        assert template.format(**values) == str(order)
+
+    # and from a version's FIXMessage, by MsgType
+
+    template = FIX.FIX44.FIXMessage.template('ClOrdID', MsgType='F', OrigClOrdID='C1')
+    assert template.cls is FIX.FIX44.OrderCancelRequest
+    assert template.format(ClOrdID='C2') == str(FIX.FIX44.OrderCancelRequest(OrigClOrdID='C1', ClOrdID='C2'))
+
+    # every variable must be a field of the message
+
+    try:
+        FIX.FIX42.NewOrderSingle.template('ClOrdID', 'NotAField')
+    except KeyError:
+        pass
+    else:
+        assert False, 'NotAField is not a field of NewOrderSingle'
+
+    try:
+        template.format()
+    except KeyError:
+        pass
+    else:
+        assert False, 'ClOrdID should be required'
+
+
+def test_encode_into():
+    orders = [FIX.FIX42.NewOrderSingle(ClOrdID='C%d' % (i, ), Symbol='IBM') for i in range(3)]
+    expected = ''.join(map(str, orders))
+
+    buffer = bytearray(len(expected) + 10)
+    assert orders[0].encode_into(buffer, 5) == 5 + len(str(orders[0]))
+    assert buffer[5:5 + len(str(orders[0]))] == str(orders[0])
+
+    offsets = FIXMessage.encode_many(orders, buffer, 5)
+    assert offsets == [5, 45, 85, 125]
+    assert buffer[5:125] == expected
+    assert [str(buffer[a:b]) for a, b in zip(offsets, offsets[1:])] == map(str, orders)
+    assert len(buffer) == len(expected) + 10
+
+    # any writable buffer, the same size as before
+
+    view = memoryview(buffer)[5:]
+    assert FIXMessage.encode_many(reversed(orders), view) == [0, 40, 80, 120]
+    assert buffer[5:125] == ''.join(map(str, reversed(orders)))
+
+    for offset in (-1, 100):
+        try:
+            orders[0].encode_into(buffer, offset)
+        except ValueError:
+            pass
+        else:
+            assert False, 'the message does not fit at %d' % (offset, )
+    assert len(buffer) == len(expected) + 10
+
+
+def test_copy():
+    formatted = '8=FIX.4.2|9=65|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|10=211|'
+    order = FIX.FIX42.NewOrderSingle.fromstring(formatted)
+    symbol = order.get('Symbol')
+    account = order.get('NoAllocs')[1][0]
+    str(order)
+
+    # nothing is copied, and nothing formatted again, until it's needed
+
+    copy = order.copy()
+    assert type(copy) is FIX.FIX42.NewOrderSingle
+    assert str(copy) is str(order)
+    assert '_initialized' not in copy.__dict__ and '_initialized' not in order.__dict__
+
+    resend = copy.copy()
+    resend.header.set('PossDupFlag', 'Y')
+    resend.header.set('MsgSeqNum', '2')
+    assert '_initialized' in resend.header.__dict__
+    assert '_initialized' not in resend.__dict__
+    assert resend._format() is order._format()
+
+    expected = '8=FIX.4.2|9=70|35=D|49=A|56=B|34=2|43=Y|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|10=206|'
+    assert repr(resend) == expected
+    assert repr(order) == repr(copy) == formatted
+
+    # the original keeps its fields, copies get copies of them
+
+    assert copy.get('Symbol') is not symbol and copy.get('Symbol') == symbol
+    assert order.get('Symbol') is symbol and symbol.group is None
+    assert copy.get('NoAllocs')[1][0].group is copy.get('NoAllocs')
+
+    # whichever changes, the others don't
+
+    symbol.value = 'MSFT'
+    account.value = 'A3'
+    copy.set('Price', '1.5')
+    assert repr(order) == '8=FIX.4.2|9=66|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A3|80=2|55=MSFT|54=1|10=055|'
+    assert repr(copy) == '8=FIX.4.2|9=72|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|44=1.5|10=011|'
+    assert repr(resend) == expected
+
+    group = order.get('NoAllocs').copy()
+    assert group.group is None and repr(group) == '78=2|'
+    assert [repr(f) for f in group] == ['79=A1|', '80=1|', '79=A3|', '80=2|']
+    assert all(f.group is group for f in group)
+
+    # messages with no fields yet in their body or trailer
+
+    empty = FIX.FIX42.NewOrderSingle(SenderCompID='S', TargetCompID='T', MsgSeqNum='1')
+    str(empty)
+
+    copy = empty.copy()
+    copy.set('Symbol', 'IBM')
+    assert str(copy) == '8=FIX.4.2\x019=27\x0135=D\x0149=S\x0156=T\x0134=1\x0155=IBM\x0110=058\x01'
+    assert str(empty) == '8=FIX.4.2\x019=20\x0135=D\x0149=S\x0156=T\x0134=1\x0110=179\x01'
+
+    copy = empty.copy()
+    copy.trailer.set('SignatureLength', '4')
+    assert str(copy) == '8=FIX.4.2\x019=25\x0135=D\x0149=S\x0156=T\x0134=1\x0193=4\x0110=150\x01'
+    assert str(empty) == '8=FIX.4.2\x019=20\x0135=D\x0149=S\x0156=T\x0134=1\x0110=179\x01'
+
+    copy = empty.copy()
+    empty.set('Account', 'ACC')
+    copy.set('Symbol', 'IBM')
+    assert str(empty) == '8=FIX.4.2\x019=26\x0135=D\x0149=S\x0156=T\x0134=1\x011=ACC\x0110=239\x01'
+    assert str(copy) == '8=FIX.4.2\x019=27\x0135=D\x0149=S\x0156=T\x0134=1\x0155=IBM\x0110=058\x01'
+
+
+def test_reset_pool():
+    cls = FIX.FIX42.NewOrderSingle
+    fields = dict(SenderCompID='A', TargetCompID='B', MsgSeqNum=1, ClOrdID='C1',
+                  Symbol='IBM', Side='1')
+    order = cls(**fields)
+    symbol = order.get('Symbol')
+    str(order)
+
+    # the same fields, new values, set where they are
+
+    fields.update(MsgSeqNum=2, ClOrdID='C2', Side='2')
+    assert order.reset(**fields) is order
+    assert order.get('Symbol') is symbol
+    assert repr(order) == repr(cls(**fields))
+
+    # other fields, and groups, as creating the message would
+
+    allocs = dict(fields, NoAllocs=[{'AllocAccount': 'A1', 'AllocShares': 1}])
+    assert repr(order.reset(**allocs)) == repr(cls(**allocs))
+    assert order.get('Symbol') is symbol
+
+    del fields['Side']
+    assert repr(order.reset(**fields)) == repr(cls(**fields))
+    assert 'Side' not in order and 'NoAllocs' not in order
+
+    # the fields removed are set again by set
+
+    side = order.reset(**allocs).get('Side')
+    order.reset(**fields)
+    assert order.set('Side', '1') is side and repr(side) == '54=1|'
+
+    group = order.reset(**allocs).get('NoAllocs')
+    group.reset({'AllocAccount': 'A2'}, {'AllocAccount': 'A3'})
+    assert order.get('NoAllocs') is group
+    assert [repr(f) for f in group] == ['79=A2|', '79=A3|']
+    assert '|78=2|79=A2|79=A3|55=IBM|' in repr(order)
+
+    # messages released are acquired again, up to pool_size of them
+
+    assert cls.acquire(**fields) is not order
+    order.release()
+    assert cls.acquire(**fields) is order
+    assert repr(order) == repr(cls(**fields))
+
+    released = [cls(**fields) for _ in xrange(cls.pool_size + 1)]
+    for message in released:
+        message.release()
+    assert len(cls._pool) == cls.pool_size
+    assert all(cls.acquire(**fields) is m for m in reversed(released[:-1]))
+    assert type(FIX.FIX42.FIXMessage.acquire(MsgType='F')) is FIX.FIX42.OrderCancelRequest
+
+
+def test_parse_buffer():
+    formatted = '8=FIX.4.2|9=65|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|10=211|'
+    expected = parse_message(formatted)
+    assert expected['NoAllocs'] == [{'AllocAccount': 'A1', 'AllocShares': '1'},
+                                    {'AllocAccount': 'A2', 'AllocShares': '2'}]
+
+    # any buffer parses as the same str does, to values that are str
+
+    for message in (bytearray(formatted), memoryview(formatted),
+                    memoryview(bytearray(formatted))):
+        parts = parse_message(message)
+        assert parts == expected and type(parts['Symbol']) is str
+
+    # unicode is parsed as its UTF-8 encoding
+
+    assert parse_message(unicode(formatted)) == expected
+    assert repr(FIX.FIXMessage.fromstring(unicode(formatted))) == formatted
+    assert parse_message(u'8=FIX.4.2|35=D|55=\xe9|')['Symbol'] == '\xc3\xa9'
+
+    # the data of a LENGTH field may contain the delimiter
+
+    parts = parse_message('8=FIX.4.2|9=30|35=B|95=7|96=a|b=c|d|148=X|10=000|')
+    assert parts['RawData'] == 'a|b=c|d' and parts['Headline'] == 'X'
+
+    # tags with leading zeros, messages without a BeginString
+
+    assert parse_message('8=FIX.4.2|9=5|35=0|0049=A|10=000|')['SenderCompID'] == 'A'
+    assert parse_message('35=0|49=A|56=B|10=000|') == {
+        'MsgType': '0', 'SenderCompID': 'A', 'TargetCompID': 'B', 'CheckSum': '000'}
+
+
+def test_stream_decoder():
+    order = '8=FIX.4.2|9=65|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|10=211|'
+    heartbeat = '8=FIX.4.4|9=41|35=0|49=B|56=A|34=2|52=20150406-18:23:24|10=141|'
+    stream = (order + heartbeat) * 3
+
+    # messages split across reads, and many in one read
+
+    for size in (1, 2, 7, 64, len(stream)):
+        decoder = FIXStreamDecoder(delimiter='|')
+        messages = []
+        for i in xrange(0, len(stream), size):
+            messages.extend(decoder.feed(stream[i:i + size]))
+        assert [repr(m) for m in messages] == [order, heartbeat] * 3
+        assert [type(m) for m in messages] == [FIX.FIX42.NewOrderSingle, FIX.FIX44.Heartbeat] * 3
+        assert len(decoder) == 0
+
+    # anything between messages is skipped, reads may be any buffer
+
+    decoder = FIXStreamDecoder(delimiter='|', view=True)
+    assert decoder.feed('10=000|garbage8=FIX' + order[:30]) == []
+    messages = decoder.feed(bytearray(order[30:] + 'x|8'))
+    assert len(messages) == 1 and str(messages[0]) == order
+    assert messages[0].get('Symbol').value == 'IBM'
+    assert len(decoder) == 1
+
+    messages = decoder.feed(memoryview(heartbeat[1:]))
+    assert [str(m) for m in messages] == [heartbeat] and len(decoder) == 0
+
+    # a message split across many reads is added to, not copied, and
+    # what's skipped is dropped once there's enough of it
+
+    news = repr(FIX.FIX42.News(SenderCompID='A', TargetCompID='B', MsgSeqNum='1', Headline='H',
+                               RawDataLength='10000', RawData='x' * 10000))
+    decoder = FIXStreamDecoder(delimiter='|')
+    decoder.feed(news[:100])
+    buffer = decoder._buffer
+    for i in xrange(100, len(news) - 100, 100):
+        assert decoder.feed(news[i:i + 100]) == [] and decoder._buffer is buffer
+    messages = decoder.feed(news[i + 100:] + 'x' * 100)
+    assert [repr(m) for m in messages] == [news] and len(decoder) == 0
+
+    for i in xrange(0, TRIM_SIZE + 1000, 1000):
+        decoder.feed('x' * 1000)
+    assert len(decoder._buffer) < TRIM_SIZE and len(decoder) == 0
+
+    # a message whose BodyLength is wrong is skipped, not the next one
+
+    bad = order.replace('9=65', '9=60')
+    messages = FIXStreamDecoder(cls=FIX.FIX42.NewOrderSingle, delimiter='|').feed(bad + order)
+    assert [repr(m) for m in messages] == [order]
+
+
+def test_parse_many():
+    order = '8=FIX.4.2|9=65|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|10=211|'
+    heartbeat = '8=FIX.4.4|9=41|35=0|49=B|56=A|34=2|52=20150406-18:23:24|10=141|'
+    captured = order + '\n' + heartbeat + order[:40]
+
+    parts = parse_many(captured, delimiter='|')
+    assert parts == [parse_message(order), parse_message(heartbeat)]
+
+    messages = parse_many(bytearray(captured), delimiter='|', results='message')
+    assert [type(m) for m in messages] == [FIX.FIX42.NewOrderSingle, FIX.FIX44.Heartbeat]
+    assert [repr(m) for m in messages] == [order, heartbeat]
+    assert messages[0].get('NoAllocs')[1][0].value == 'A2'
+
+    views = parse_many(captured, delimiter='|', results='view')
+    assert [str(v) for v in views] == [order, heartbeat]
+    assert views[1].cls is FIX.FIX44.Heartbeat and views[0].get(55).value == 'IBM'
+
+    messages = parse_many(order * 2, cls=FIX.FIX42.Allocation, delimiter='|', results='message')
+    assert [type(m) for m in messages] == [FIX.FIX42.Allocation] * 2
+
+    assert parse_many('', delimiter='|') == []
+
+    try:
+        parse_many(order, results='list')
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def _count_msg_type(counts, parts):
+    counts[parts['MsgType']] += 1
+    return counts
+
+
+def test_logscan():
+    order = '8=FIX.4.2|9=65|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|10=211|'
+    heartbeat = '8=FIX.4.4|9=41|35=0|49=B|56=A|34=2|52=20150406-18:23:24|10=141|'
+    lines = ['20150406-18:23:24.%03d : %s\n' % (i, (order, heartbeat)[i % 2]) for i in range(50)]
+
+    log_dir = tempfile.mkdtemp()
+    path = os.path.join(log_dir, 'session.log')
+
+    try:
+        with open(path, 'wb') as f:
+            f.write(''.join(lines))
+
+        chunks = split_log(path, 300, '|')
+        assert len(chunks) > 10 and chunks[0][0] == 0 and chunks[-1][1] == len(''.join(lines))
+        with open(path, 'rb') as f:
+            content = f.read()
+        assert all(content.startswith('8=FIX', start) for start, end in chunks[1:])
+
+        parsed = parse_many(content, delimiter='|')
+        assert len(parsed) == 50
+        assert list(scan_log(path, processes=2, chunk_size=300, delimiter='|')) == parsed
+        assert list(scan_log(path, len, processes=1, chunk_size=300, delimiter='|')) == map(len, parsed)
+
+        counts = reduce_log(path, _count_msg_type, operator.add, Counter(),
+                            processes=2, chunk_size=300, delimiter='|')
+        assert counts == Counter({'D': 25, '0': 25})
+
+        # views and messages stay in the process they're parsed by
+
+        assert list(scan_log(path, str, processes=2, chunk_size=300, delimiter='|',
+                             results='view')) == [order, heartbeat] * 25
+        messages = list(scan_log(path, processes=1, chunk_size=300, delimiter='|',
+                                 results='message'))
+        assert [repr(m) for m in messages] == [order, heartbeat] * 25
+
+        try:
+            scan_log(path, processes=2, chunk_size=300, delimiter='|', results='message')
+        except ValueError:
+            pass
+        else:
+            assert False
+
+        # the last message is incomplete
+
+        with open(path, 'ab') as f:
+            f.write(order[:40])
+        assert list(scan_log(path, processes=1, chunk_size=300, delimiter='|')) == parsed
+
+        with open(path, 'wb') as f:
+            pass
+        assert split_log(path) == [] and list(scan_log(path)) == []
+        assert reduce_log(path, _count_msg_type, operator.add, Counter()) == Counter()
+    finally:
+        shutil.rmtree(log_dir)
+
+
+def test_parse_nested_groups():
+    sides = [{'Side': str(i + 1), 'ClOrdID': 'C%d' % i, 'OrderQty': '100',
+              'NoPartyIDs': [{'PartyID': 'P%d%d' % (i, j), 'PartyRole': '1',
+                              'NoPartySubIDs': [{'PartySubID': 'S%d%d%d' % (i, j, k), 'PartySubIDType': '2'}
+                                                for k in range(2)]}
+                             for j in range(2)]}
+             for i in range(2)]
+
+    cross = FIX.FIX44.NewOrderCross(CrossID='X1', CrossType='1', CrossPrioritization='0',
+                                    NoSides=sides, Symbol='IBM', OrdType='1')
+    raw = str(cross)
+
+    assert '|453=2|448=P00|452=1|802=2|523=S000|803=2|523=S001|803=2|448=P01|' in repr(cross)
+
+    parts = parse_message(raw)
+    assert parts['NoSides'] == sides
+    assert parts['Symbol'] == 'IBM' and parts['OrdType'] == '1'
+    assert str(FIX.FIX44.NewOrderCross.fromstring(raw)) == raw
+
+    # only a group's first field starts its next repetition, fields out
+    # of order (here NoAllocs and Side, after Symbol) stay in theirs
+
+    header = '8=FIX.4.4|9=5|35=E|49=A|56=B|34=1|52=20150406-18:23:24|66=L1|394=1|68=2|73=2|'
+    orders = ['11=C1|67=1|55=IBM|78=1|79=A1|80=10|54=1|40=1|',
+              '11=C2|67=2|55=MSFT|54=2|78=1|79=A2|80=20|40=1|']
+
+    parts = parse_message(header + ''.join(orders) + '10=000|')
+    assert parts['NoOrders'] == [
+        {'ClOrdID': 'C1', 'ListSeqNo': '1', 'Symbol': 'IBM', 'Side': '1', 'OrdType': '1',
+         'NoAllocs': [{'AllocAccount': 'A1', 'AllocQty': '10'}]},
+        {'ClOrdID': 'C2', 'ListSeqNo': '2', 'Symbol': 'MSFT', 'Side': '2', 'OrdType': '1',
+         'NoAllocs': [{'AllocAccount': 'A2', 'AllocQty': '20'}]}]
+
+    formatted = repr(FIX.FIX44.NewOrderList(**parts))
+    assert '|73=2|11=C1|67=1|78=1|79=A1|80=10|55=IBM|54=1|40=1|11=C2|' in formatted
+    assert parse_message(formatted)['NoOrders'] == parts['NoOrders']
+
+
+def test_parse_tags():
+    formatted = '8=FIX.4.2|9=130|35=8|49=A|56=B|34=1|95=7|96=a|39=b|d|37=O1|11=C1|17=E1|20=0|150=2|39=2|55=IBM|54=1|382=2|375=X|375=Y|38=100|151=0|14=100|6=101.25|10=255|'
+
+    # RawData (96) is skipped over by its length, rather than parsed
+
+    parts = parse_message(formatted, tags=(35, 11, 37, 39, 150, 55))
+    assert parts == {'MsgType': '8', 'ClOrdID': 'C1', 'OrderID': 'O1',
+                     'OrdStatus': '2', 'ExecType': '2', 'Symbol': 'IBM'}
+    assert parts == dict((name, parse_message(formatted)[name]) for name in parts)
+
+    assert parse_message(formatted, tags=[96, '375']) == {'RawData': 'a|39=b|d',
+                                                          'ContraBroker': 'X'}
+    assert parse_message(formatted, tags=(8, 10, 12345)) == {'BeginString': 'FIX.4.2',
+                                                            'CheckSum': '255'}
+    assert parse_message(formatted, tags=()) == {}
+
+    assert parse_many(formatted * 2, delimiter='|', tags=(55, )) == [{'Symbol': 'IBM'}] * 2
+
+    try:
+        parse_many(formatted, delimiter='|', results='view', tags=(55, ))
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_parse_typed():
+    formatted = '8=FIX.4.2|9=164|35=8|49=A|56=B|34=12|52=20150406-18:23:24.391|37=O1|11=C1|17=E1|20=0|150=2|39=2|55=IBM|54=1|38=300|44=101.25|151=0|14=300|6=101.25|60=20150406-18:23:24|75=20150406|10=077|'
+
+    parts = parse_message(formatted, typed=True)
+    assert parts['BodyLength'] == 164 and parts['MsgSeqNum'] == 12
+    assert parts['SendingTime'] == datetime.datetime(2015, 4, 6, 18, 23, 24, 391000)
+    assert parts['TransactTime'] == datetime.datetime(2015, 4, 6, 18, 23, 24)
+    assert parts['TradeDate'] == datetime.date(2015, 4, 6)
+    assert parts['Price'] == Decimal('101.25') and type(parts['AvgPx']) is Decimal
+    assert parts['OrderQty'] == 300.0 and type(parts['LeavesQty']) is float
+    assert parts['OrdStatus'] == '2' and parts['Symbol'] == 'IBM' and parts['CheckSum'] == '077'
+
+    assert parse_message(formatted, tags=(34, 39, 44), typed=True) == {
+        'MsgSeqNum': 12, 'OrdStatus': '2', 'Price': Decimal('101.25')}
+    assert parse_many(formatted, delimiter='|', typed=True) == [parts]
+
+    try:
+        parse_many(formatted, delimiter='|', results='message', typed=True)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+    # values that aren't valid for their type are left as they are
+
+    assert decode_value('SEQNUM', '-7') == -7
+    assert decode_value('SEQNUM', '7a') == '7a'
+    assert decode_value('PRICE', '-.5') == Decimal('-0.5')
+    assert decode_value('PRICE', '1e5') == '1e5'
+    assert decode_value('QTY', '2.') == 2.0 and decode_value('QTY', '1,5') == '1,5'
+
+    # prices are exactly what was sent, numbers aren't read by the locale
+
+    assert decode_value('AMT', '101.1') == Decimal('101.1') != 101.1
+    assert str(decode_value('PRICE', '0.30')) == '0.30'
+
+    try:
+        locale.setlocale(locale.LC_NUMERIC, 'de_DE.UTF-8')
+    except locale.Error:
+        pass
+    else:
+        try:
+            assert decode_value('QTY', '101.25') == 101.25
+            assert decode_value('QTY', '101,25') == '101,25'
+        finally:
+            locale.setlocale(locale.LC_NUMERIC, 'C')
+    assert decode_value('BOOLEAN', 'Y') is True and decode_value('BOOLEAN', 'y') == 'y'
+    assert decode_value('UTCTIMESTAMP', '20150406-18:23:24.123456789') == \
+        datetime.datetime(2015, 4, 6, 18, 23, 24, 123456)
+    assert decode_value('UTCTIMESTAMP', '20150406-23:59:60') == '20150406-23:59:60'
+    assert decode_value('LOCALMKTDATE', '20160229') == datetime.date(2016, 2, 29)
+    assert decode_value('LOCALMKTDATE', '20150229') == '20150229'
+    assert decode_value('UTCTIMEONLY', '18:23:24.5') == datetime.time(18, 23, 24, 500000)
+    assert decode_value('STRING', '12') == '12' and decode_value('INT', None) is None
+
+    # fields convert their values as they're read
+
+    message = FIX.FIX42.ExecutionReport.fromstring(formatted.replace('|', '\001'))
+    price = message.get('Price')
+    assert price.value == '101.25' and price.typed == Decimal('101.25')
+    assert price.typed is price.typed
+    price.value = '99.5'
+    assert price.typed == Decimal('99.5')
+    assert message.header.get('SendingTime').typed == parts['SendingTime']
+
+    view = FIX.FIX42.ExecutionReport.view(formatted.replace('|', '\001'))
+    assert view.get('LeavesQty').typed == 0 and view.get('Side').typed == '1'
+
+
 def test_iadd_isub():
 
     args = ('C111111', )
@@ -964,3 +1875,131 @@ def test_generators():
 
     assert FIX.FIX42.NewOrderSingle.Symbol().value.isupper()
     assert len(FIX.FIX42.NewOrderSingle.Symbol().value) in range(1, 5)
+
+    # generator data is loaded on first use, and only once
+
+    assert generators.iso_codes() is generators.iso_codes()
+    assert FIX.FIX42.Currency().value in generators.iso_codes()['currencies']
+    assert FIX.FIX42.Text().value
+
+    # as the module's constants, for code that imports them
+
+    from phixlib.generators import ISO_CODES, WORDLIST
+    assert ISO_CODES is generators.ISO_CODES is generators.iso_codes()
+    assert WORDLIST is generators.wordlist()
+
+
+def test_session():
+    FIX.register_session('FIXT.1.1', ['FIX.5.0SP2', 'FIX.5.0SP1'])
+
+    assert FIX.FIXT11.Applications['9'] is FIX.FIX50SP2
+    assert FIX.FIXT11.Applications['8'] is FIX.FIX50SP1
+    assert FIX.FIXT11.Applications[None] is FIX.FIX50SP2
+
+    # application messages share the transport header and trailer
+
+    assert FIX.FIX50SP2.NewOrderSingle.Header is FIX.FIXT11.Header
+    assert FIX.FIX50SP1.NewOrderSingle.Trailer is FIX.FIXT11.Trailer
+    assert FIX.FIX50SP2.FIXMessage.Header is FIX.FIXT11.Header
+
+    message = FIX.FIX50SP2.NewOrderSingle(
+        SenderCompID='PXMD', TargetCompID='Q037', MsgSeqNum='2',
+        SendingTime='20140922-14:48:49.825', ClOrdID='C11111', Side='1',
+        TransactTime='20140922-14:48:49.825', OrdType='2', Price='1.5',
+        OrderQty='100', Symbol='ESZ5',
+        NoPartyIDs=[{'PartyID': 'P1', 'PartyRole': '3'},
+                    {'PartyID': 'P2', 'PartyRole': '4'}])
+
+    formatted = '8=FIXT.1.1|9=150|35=D|49=PXMD|56=Q037|34=2|52=20140922-14:48:49.825|11=C11111|453=2|448=P1|452=3|448=P2|452=4|55=ESZ5|54=1|60=20140922-14:48:49.825|38=100|40=2|44=1.5|10=041|'
+    assert repr(message) == formatted
+
+    # the default application version parses groups of its own
+
+    parts = parse_message(formatted)
+    assert parts['NoPartyIDs'] == [{'PartyID': 'P1', 'PartyRole': '3'},
+                                   {'PartyID': 'P2', 'PartyRole': '4'}]
+
+    fromstring = FIX.FIXMessage.fromstring(formatted)
+    assert isinstance(fromstring, FIX.FIX50SP2.NewOrderSingle)
+    assert repr(fromstring) == formatted
+
+    # ApplVerID picks the application version, after MsgType
+
+    applverid = formatted.replace('35=D|', '35=D|1128=8|')
+    parts = parse_message(applverid)
+    assert parts['ApplVerID'] == '8'
+    assert parts['NoPartyIDs'][1] == {'PartyID': 'P2', 'PartyRole': '4'}
+    assert isinstance(FIX.FIXMessage.fromstring(applverid), FIX.FIX50SP1.NewOrderSingle)
+    assert FIX.FIXMessage.view(applverid).cls is FIX.FIX50SP1.NewOrderSingle
+
+    # as does a default ApplVerID, e.g. from the session's Logon
+
+    parts = parse_message(formatted, appl_ver_id='8')
+    assert parts['NoPartyIDs'][0] == {'PartyID': 'P1', 'PartyRole': '3'}
+
+    # only the fields asked for, of the application version
+
+    assert parse_message(applverid, tags=(11, 55, 448)) == {'ClOrdID': 'C11111', 'Symbol': 'ESZ5',
+                                                            'PartyID': 'P1'}
+    assert isinstance(FIX.FIXMessage(BeginString='FIXT.1.1', MsgType='D', ApplVerID='8'),
+                      FIX.FIX50SP1.NewOrderSingle)
+
+    # session messages come from the transport
+
+    logon = FIX.FIXMessage.fromstring('8=FIXT.1.1|9=26|35=A|98=0|108=30|1137=9|10=000|')
+    assert isinstance(logon, FIX.FIXT11.Logon)
+    assert logon.get('DefaultApplVerID').value == '9'
+
+
+def test_view():
+    formatted = '8=FIX.4.2|9=65|35=D|49=A|56=B|34=1|11=C1|78=2|79=A1|80=1|79=A2|80=2|55=IBM|54=1|10=211|'
+
+    view = FIX.FIXMessage.view(formatted)
+    assert view.cls is FIX.FIX42.NewOrderSingle
+    assert view.msgtype == 'D' and view.version == 'FIX.4.2'
+
+    # nothing is created until it's accessed
+
+    assert not view._fields
+    assert view.get('Symbol').value == 'IBM'
+    assert view.get(55) is view.get('55') is view.get(FIX.FIX42.Symbol)
+    assert isinstance(view.get(55), FIX.FIX42.NewOrderSingle.Symbol)
+    assert len(view._fields) == 1
+
+    assert 'Symbol' in view and 55 in view and view.get(55) in view
+    assert 'Price' not in view and view.get('Price') is None
+    assert FIX.FIX42.Symbol('IBM') not in view
+
+    # repeating groups are flat, a tag's first occurrence is returned
+
+    assert view.get('NoAllocs').value == '2'
+    assert view.get('AllocAccount').value == 'A1'
+    assert [repr(f) for f in view] == [f + '|' for f in formatted.split('|')[:-1]]
+
+    order = FIX.FIXMessage.fromstring(formatted)
+    assert len(view) == len(order) == 65
+    assert str(view) is formatted
+    assert not view.modified
+    assert repr(view.parse()) == formatted
+
+    # any buffer will do, and its bytes are returned as they are
+
+    raw = str(order)
+    assert str(FIX.FIXMessage.view(bytearray(raw))) == raw
+    assert FIX.FIX42.FIXMessage.view(memoryview(raw)).get(11).value == 'C1'
+
+    # modified views are formatted again
+
+    view.get('Symbol').value = 'MSFT'
+    view.set('Price', '1.5')
+    assert view.modified
+
+    order.set('Symbol', 'MSFT')
+    order.set('Price', '1.5')
+    assert repr(view) == repr(order)
+    assert repr(FIX.FIXMessage.fromstring(repr(view))) == repr(view)
+
+    # RawData may contain the delimiter, its RawDataLength says how long it is
+
+    raw = '8=FIX.4.2|9=5|35=B|148=Hi|95=3|96=a|b|10=000|'
+    assert FIX.FIXMessage.view(raw).get('RawData').value == 'a|b'